@@ -51,6 +51,12 @@ const fallbackJobs = [
 ];
 
 let jobs = [];
+// Local copy of the feed keyed by confirmation code; kept current via /jobs/changes and /jobs/stream
+const jobsByCode = new Map();
+// Advanced only by /jobs/changes; SSE pushes are from this pod alone and can run ahead of it
+let cursor = 0;
+let stream = null;
+const RESYNC_MS = 30000;
 
 function renderJobs(list) {
   jobsGrid.innerHTML = "";
@@ -116,14 +122,21 @@ async function loadJobs() {
     return;
   }
   try {
-    const resp = await fetch(`${JOB_SERVICE}/jobs`);
-    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
-    const data = await resp.json();
-    let mapped = mapJobs(data);
     if (REF_CODE) {
-      mapped = mapped.filter((j) => j.confirmation_code === REF_CODE);
+      // Shared link: fetch just the referenced job instead of the whole feed
+      const resp = await fetch(`${JOB_SERVICE}/jobs/${encodeURIComponent(REF_CODE)}`);
+      if (resp.status === 404) {
+        jobs = [];
+        renderJobs(jobs);
+        return;
+      }
+      if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+      jobs = mapJobs([await resp.json()]);
+    } else {
+      await syncChanges();
+      openStream();
+      setInterval(resync, RESYNC_MS);
     }
-    jobs = mapped;
   } catch (err) {
     console.warn("Falling back to mock jobs:", err);
     jobs = fallbackJobs;
@@ -131,11 +144,60 @@ async function loadJobs() {
   renderJobs(jobs);
 }
 
+function mergeJobs(apiJobs) {
+  mapJobs(apiJobs).forEach((job) => {
+    const key = job.confirmation_code || job.id;
+    const known = jobsByCode.get(key);
+    if (!known || job.seq >= known.seq) jobsByCode.set(key, job);
+  });
+  jobs = Array.from(jobsByCode.values()).sort((a, b) => b.seq - a.seq);
+}
+
+// Pull only what changed since the last cursor (everything on first load)
+async function syncChanges() {
+  let more = true;
+  while (more) {
+    const resp = await fetch(`${JOB_SERVICE}/jobs/changes?since=${cursor}`);
+    if (!resp.ok) throw new Error(`HTTP ${resp.status}`);
+    const data = await resp.json();
+    if (data.reset) jobsByCode.clear();
+    mergeJobs(data.jobs);
+    cursor = data.cursor;
+    more = data.more;
+  }
+}
+
+// Newly published jobs are pushed over SSE; on "reset" the client fell behind and re-syncs
+function openStream() {
+  if (!window.EventSource) return;
+  stream = new EventSource(`${JOB_SERVICE}/jobs/stream?since=${cursor}`);
+  stream.addEventListener("job", (evt) => {
+    mergeJobs([JSON.parse(evt.data)]);
+    applyFilters();
+  });
+  stream.addEventListener("reset", async () => {
+    stream.close();
+    await resync();
+    openStream();
+  });
+}
+
+// Periodic catch-up covers jobs published on other pods, which are never pushed here
+async function resync() {
+  try {
+    await syncChanges();
+    applyFilters();
+  } catch (err) {
+    console.warn("Feed resync failed:", err);
+  }
+}
+
 function mapJobs(apiData) {
   // Expecting array of jobs; adjust mapping as needed.
   if (!Array.isArray(apiData)) return [];
   return apiData.map((j, idx) => ({
     id: j.id || `job-${idx}`,
+    seq: j.seq || 0,
     confirmation_code: j.confirmation_code || j.ref || null,
     title: j.title || "Role",
     company: j.company_name || j.business_name || "Business",
@@ -150,6 +212,7 @@ function mapJobs(apiData) {
     whatsapp_number: j.contact_phone || null,
     pay_type: j.pay_type || j.payment_type || "",
     images: j.images || j.media_urls || [],
+    thumbnails: j.thumbnails || [],
   }));
 }
 
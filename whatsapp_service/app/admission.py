@@ -0,0 +1,155 @@
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def retry_after(self) -> float:
+        """Seconds until the next token is available."""
+        if self.tokens >= 1 or self.rate <= 0:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Rate limits inbound messages per chat_id and globally.
+    Per-chat buckets are kept in an LRU capped at max_chats so memory stays bounded.
+    """
+
+    def __init__(
+        self,
+        per_chat_rate: float,
+        per_chat_burst: float,
+        global_rate: float,
+        global_burst: float,
+        max_chats: int = 10000,
+    ):
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.max_chats = max_chats
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._chats: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.admitted = 0
+        self.rejected = {"chat": 0, "global": 0}
+
+    def admit(self, chat_id: str) -> Optional[str]:
+        """Returns None if admitted, otherwise the limit that rejected it ("chat" or "global")."""
+        now = time.monotonic()
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.per_chat_rate, self.per_chat_burst)
+            self._chats[chat_id] = bucket
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        # Check the sender first so one noisy chat cannot drain the global budget
+        if not bucket.try_acquire(now):
+            self.rejected["chat"] += 1
+            return "chat"
+        if not self.global_bucket.try_acquire(now):
+            bucket.tokens = min(bucket.burst, bucket.tokens + 1)  # refund the sender
+            self.rejected["global"] += 1
+            return "global"
+        self.admitted += 1
+        return None
+
+    def retry_after(self, chat_id: str, reason: str) -> int:
+        bucket = self.global_bucket if reason == "global" else self._chats.get(chat_id)
+        wait = bucket.retry_after() if bucket else 1.0
+        return max(1, int(wait + 0.999))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "tracked_chats": len(self._chats),
+            "limits": {
+                "per_chat_rate": self.per_chat_rate,
+                "per_chat_burst": self.per_chat_burst,
+                "global_rate": self.global_bucket.rate,
+                "global_burst": self.global_bucket.burst,
+            },
+        }
+
+
+class LoadShedder:
+    """
+    Decides when to skip the LLM tier. Sheds while the number of in-flight calls is at
+    max_inflight, or while the latency EWMA is above max_latency; after `cooldown` seconds
+    without a sample, calls are let through again to re-measure. A probe that comes back
+    under max_latency resets the EWMA, so recovery is not averaged out over several cooldowns.
+    """
+
+    def __init__(self, max_inflight: int, max_latency: float, cooldown: float = 30.0, alpha: float = 0.2):
+        self.max_inflight = max_inflight
+        self.max_latency = max_latency
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self.inflight = 0
+        self.latency_ewma = 0.0
+        self._last_sample = 0.0
+        self.calls = 0
+        self.shed = 0
+
+    def state(self) -> Optional[str]:
+        """Current shedding reason ("backlog" or "latency"), or None when not shedding."""
+        if self.inflight >= self.max_inflight:
+            return "backlog"
+        if self.latency_ewma > self.max_latency and time.monotonic() - self._last_sample < self.cooldown:
+            return "latency"
+        return None
+
+    def should_shed(self) -> bool:
+        if self.state() is None:
+            return False
+        self.shed += 1
+        return True
+
+    @contextmanager
+    def track(self) -> Iterator[None]:
+        self.inflight += 1
+        self.calls += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            now = time.monotonic()
+            elapsed = now - started
+            probe = self.latency_ewma > self.max_latency and started - self._last_sample >= self.cooldown
+            if self.latency_ewma == 0.0 or (probe and elapsed <= self.max_latency):
+                self.latency_ewma = elapsed
+            else:
+                self.latency_ewma += self.alpha * (elapsed - self.latency_ewma)
+            self._last_sample = now
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state() or "normal",
+            "inflight": self.inflight,
+            "latency_ewma_seconds": round(self.latency_ewma, 3),
+            "calls": self.calls,
+            "shed": self.shed,
+            "max_inflight": self.max_inflight,
+            "max_latency_seconds": self.max_latency,
+        }
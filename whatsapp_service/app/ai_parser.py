@@ -1,9 +1,7 @@
 import json
 import os
 import re
-from typing import Dict
-
-import httpx
+from typing import Dict, List, Optional
 
 
 def _clean_value(val: str) -> str:
@@ -12,9 +10,37 @@ def _clean_value(val: str) -> str:
     return v
 
 
-def llm_parse_free_text(text: str) -> Dict[str, str]:
+ALL_FIELDS = [
+    "title",
+    "pay_rate",
+    "pay_type",
+    "location",
+    "shift_times",
+    "contact_phone",
+    "business_name",
+    "business_type",
+    "min_qualification",
+    "description",
+    "language_requirement",
+]
+
+# Few-shot examples as (input, output); outputs are trimmed to the requested fields
+_EXAMPLES = [
+    (
+        "I have a Front desk student assistant position at California State University, Sacramento with offering pay rate of $18 per hour and the payment will be biweekly deposited into their registered account. Should be able to work from 9AM - 5PM from Monday to Friday. You can reach out or send your resumes to rajakolagotla@gmail.com. Candidates should be able to communicate in English and Spanish and should be able to well receive the customers coming to the office. Type of business is education and business name is Social welfare office at California State University-Sacramento.",
+        {"title": "Front desk student assistant", "pay_rate": "$18/hour", "pay_type": "hourly", "location": "California State University, Sacramento", "shift_times": "9AM - 5PM Monday to Friday", "contact_phone": "rajakolagotla@gmail.com", "business_name": "Social welfare office at California State University-Sacramento", "business_type": "education", "min_qualification": "", "description": "Candidates should be able to communicate in English and Spanish and should be able to well receive the customers coming to the office.", "language_requirement": "English, Spanish"},
+    ),
+    (
+        "Hiring a barista. $20/hr. Location: 123 Market St, SF. Shifts: Sat-Sun 7am-1pm. Contact: +15551234567. Business: Moonlight Cafe, type restaurant. Need latte art.",
+        {"title": "barista", "pay_rate": "$20/hr", "pay_type": "hourly", "location": "123 Market St, SF", "shift_times": "Sat-Sun 7am-1pm", "contact_phone": "+15551234567", "business_name": "Moonlight Cafe", "business_type": "restaurant", "min_qualification": "", "description": "Need latte art.", "language_requirement": ""},
+    ),
+]
+
+
+def llm_parse_free_text(text: str, fields: Optional[List[str]] = None) -> Dict[str, str]:
     """
     Attempts to extract job fields from unstructured text using OpenAI Chat Completions.
+    If fields is given, only those keys are requested (shorter prompt and completion).
     Returns a dict with any fields found; missing keys are omitted.
     Requires OPENAI_API_KEY in env. If unavailable or on error, returns {}.
     """
@@ -23,24 +49,18 @@ def llm_parse_free_text(text: str) -> Dict[str, str]:
     endpoint = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1/chat/completions")
     if not api_key:
         return {}
+    import httpx  # deferred: keeps cold start cheap when the LLM tier is disabled
 
-    examples = """
-Input:
-I have a Front desk student assistant position at California State University, Sacramento with offering pay rate of $18 per hour and the payment will be biweekly deposited into their registered account. Should be able to work from 9AM - 5PM from Monday to Friday. You can reach out or send your resumes to rajakolagotla@gmail.com. Candidates should be able to communicate in English and Spanish and should be able to well receive the customers coming to the office. Type of business is education and business name is Social welfare office at California State University-Sacramento.
-Output:
-{"title":"Front desk student assistant","pay_rate":"$18/hour","pay_type":"hourly","location":"California State University, Sacramento","shift_times":"9AM - 5PM Monday to Friday","contact_phone":"rajakolagotla@gmail.com","business_name":"Social welfare office at California State University-Sacramento","business_type":"education","min_qualification":"","description":"Candidates should be able to communicate in English and Spanish and should be able to well receive the customers coming to the office.","language_requirement":"English, Spanish"}
-
-Input:
-Hiring a barista. $20/hr. Location: 123 Market St, SF. Shifts: Sat-Sun 7am-1pm. Contact: +15551234567. Business: Moonlight Cafe, type restaurant. Need latte art.
-Output:
-{"title":"barista","pay_rate":"$20/hr","pay_type":"hourly","location":"123 Market St, SF","shift_times":"Sat-Sun 7am-1pm","contact_phone":"+15551234567","business_name":"Moonlight Cafe","business_type":"restaurant","min_qualification":"","description":"Need latte art.","language_requirement":""}
-"""
+    keys = [f for f in ALL_FIELDS if f in fields] if fields else ALL_FIELDS
+    examples = "".join(
+        f"\nInput:\n{example_in}\nOutput:\n{json.dumps({k: example_out[k] for k in keys})}\n"
+        for example_in, example_out in _EXAMPLES
+    )
 
     system = (
         "You extract concise structured job data from free text.\n"
         "Return a strict JSON object with keys: "
-        "title, pay_rate, pay_type, location, shift_times, contact_phone, business_name, "
-        "business_type, min_qualification, description, language_requirement. "
+        f"{', '.join(keys)}. "
         "Use empty strings for missing fields. Strip lead-in phrases like 'I have a', "
         "'We have an', 'Hiring a' from title/business. Respond with JSON only."
     )
@@ -54,7 +74,7 @@ Output:
                 {"role": "user", "content": user},
             ],
             "temperature": 0,
-            "max_tokens": 300,
+            "max_tokens": min(300, 40 + 40 * len(keys)),
         }
         headers = {
             "Authorization": f"Bearer {api_key}",
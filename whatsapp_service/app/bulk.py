@@ -0,0 +1,322 @@
+"""
+Bulk job ingestion for agencies posting many openings at once.
+
+Rows arrive as a streamed CSV or NDJSON upload. Each row holds templated fields (columns
+named like JobPayload fields), raw posting text (a `text` or `message` column), or both.
+Rows run through the same extraction tiers as the chat path: labelled parsing, scored
+heuristics and the distilled model in a process pool, then the LLM for fields still
+unsure. Valid jobs are written in batches; one progress event is produced per row.
+"""
+import asyncio
+import codecs
+import csv
+import json
+import logging
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from .admission import LoadShedder, TokenBucket
+from .ai_parser import ALL_FIELDS
+from .extraction import apply_llm, extract_local, llm_fields
+from .models import JobPayload
+from .schedule import parse_shift, to_hex
+from .utils import generate_confirmation_code
+
+logger = logging.getLogger("jobmatcher")
+
+TEXT_COLUMNS = ("text", "message")
+MAX_TEXT_CHARS = 8000
+MAX_LINE_BYTES = 64 * 1024
+
+Row = Dict[str, Any]
+# Returns (status, error) per job: published, duplicate or failed
+Publisher = Callable[[List[JobPayload]], Awaitable[List[Tuple[str, Optional[str]]]]]
+
+# Loaded once per worker process by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_path: Optional[str]) -> None:
+    global _worker_model
+    if not model_path:
+        return
+    from .distill import LocalExtractor
+
+    try:
+        _worker_model = LocalExtractor.load(model_path)
+    except Exception as exc:
+        logger.error(f"Bulk worker could not load distilled extractor: {exc}")
+
+
+def row_text(row: Row) -> str:
+    for column in TEXT_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, str) and value.strip():
+            return value[:MAX_TEXT_CHARS]
+    return ""
+
+
+def extract_row(
+    row: Row, required: List[str], threshold: float
+) -> Tuple[Dict[str, str], Dict[str, float]]:
+    """Local extraction tiers for one row (see app.extraction); runs in a worker process."""
+    given = {
+        k: v.strip() for k, v in row.items() if k in ALL_FIELDS and isinstance(v, str) and v.strip()
+    }
+    return extract_local(row_text(row), required, threshold, model=_worker_model, given=given)
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line + "\n"
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"line longer than {MAX_LINE_BYTES} bytes")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+
+async def _iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[List[str]]:
+    # A record is complete once its quotes balance; quoted fields may span lines
+    record = ""
+    async for line in lines:
+        record += line
+        if record.count('"') % 2:
+            if len(record) > MAX_LINE_BYTES:
+                raise ValueError(f"record longer than {MAX_LINE_BYTES} bytes")
+            continue
+        if record.strip():
+            yield next(csv.reader([record]))
+        record = ""
+    if record.strip():
+        raise ValueError("unterminated quoted field at end of upload")
+
+
+async def iter_rows(
+    chunks: AsyncIterator[bytes], fmt: str, max_rows: int
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Yields (row_number, row) for each CSV record or NDJSON line, 1-based. A row that cannot
+    be read is yielded as an error string instead of a dict so it can be reported in place.
+    """
+    lines = _iter_lines(chunks)
+    row_no = 0
+    if fmt == "csv":
+        header: Optional[List[str]] = None
+        async for values in _iter_csv_records(lines):
+            if header is None:
+                header = [h.strip().lower() for h in values]
+                continue
+            row_no += 1
+            if row_no > max_rows:
+                yield row_no, f"upload exceeds {max_rows} rows"
+                return
+            row: Row = dict(zip(header, values))
+            if "images" in row:
+                row["images"] = row["images"].split()
+            yield row_no, row
+        return
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_no += 1
+        if row_no > max_rows:
+            yield row_no, f"upload exceeds {max_rows} rows"
+            return
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield row_no, f"invalid JSON: {exc}"
+            continue
+        yield row_no, row if isinstance(row, dict) else "row must be a JSON object"
+
+
+class BulkIngestor:
+    """
+    Runs uploaded rows through the extraction tiers with at most max_inflight rows in flight,
+    and hands valid jobs to `publish` in batches of batch_size. LLM calls share the chat
+    path's load shedder and are additionally rate-limited so one upload cannot use it all.
+    """
+
+    def __init__(
+        self,
+        publish: Publisher,
+        required: List[str],
+        threshold: float,
+        workers: int = 2,
+        max_inflight: int = 16,
+        batch_size: int = 100,
+        llm: Optional[Callable[[str, List[str]], Dict[str, str]]] = None,
+        llm_threshold: float = 0.4,
+        llm_rate: float = 0.5,
+        llm_burst: float = 5,
+        shedder: Optional[LoadShedder] = None,
+        model_path: Optional[str] = None,
+        log_path: Optional[str] = None,
+    ):
+        self.publish = publish
+        self.required = required
+        self.threshold = threshold
+        self.workers = workers
+        self.max_inflight = max_inflight
+        self.batch_size = batch_size
+        self.llm = llm
+        self.llm_threshold = llm_threshold
+        self.llm_bucket = TokenBucket(llm_rate, llm_burst)
+        self.shedder = shedder
+        self.model_path = model_path
+        self.log_path = log_path
+        self.active_uploads = 0
+        self.counts: Counter = Counter()
+        self._procs: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        self._procs = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker, initargs=(self.model_path,)
+        )
+
+    def stop(self) -> None:
+        if self._procs:
+            self._procs.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"active_uploads": self.active_uploads, **self.counts}
+
+    async def _llm_fill(self, text: str, unsure: List[str]) -> Optional[Dict[str, str]]:
+        if self.shedder and self.shedder.should_shed():
+            self.counts["llm_shed"] += 1
+            return None
+        while not self.llm_bucket.try_acquire():
+            await asyncio.sleep(self.llm_bucket.retry_after())
+        self.counts["llm_calls"] += 1
+        if self.shedder:
+            with self.shedder.track():
+                return await asyncio.to_thread(self.llm, text, unsure)
+        return await asyncio.to_thread(self.llm, text, unsure)
+
+    async def _process(self, row_no: int, row: Row, chat_id: str) -> Tuple[int, Any]:
+        """Returns (row_no, JobPayload) for a valid row, otherwise (row_no, progress event)."""
+        loop = asyncio.get_running_loop()
+        parsed, confidence = await loop.run_in_executor(
+            self._procs, extract_row, row, self.required, self.threshold
+        )
+        text = row_text(row)
+        unsure = llm_fields(self.required, confidence, self.llm_threshold)
+        if unsure and text and self.llm:
+            llm = await self._llm_fill(text, unsure)
+            if llm:
+                apply_llm(parsed, confidence, llm, unsure)
+                if self.log_path:
+                    from .distill import log_example
+
+                    await asyncio.to_thread(log_example, self.log_path, text, llm, unsure)
+        missing = [f for f in self.required if not parsed.get(f)]
+        if missing:
+            return row_no, {"row": row_no, "status": "invalid", "missing": missing}
+        images = row.get("images")
+        payload = JobPayload(
+            confirmation_code=generate_confirmation_code(),
+            source_channel="bulk",
+            chat_id=chat_id,
+            shift_bits=to_hex(parse_shift(parsed.get("shift_times", ""))),
+            images=[u for u in images if isinstance(u, str)] if isinstance(images, list) else [],
+            **parsed,
+        )
+        return row_no, payload
+
+    async def _flush(self, batch: List[Tuple[int, JobPayload]]) -> List[Dict[str, Any]]:
+        if not batch:
+            return []
+        try:
+            results = await self.publish([payload for _, payload in batch])
+        except Exception as exc:
+            logger.error(f"Bulk batch write failed: {exc}")
+            return [{"row": row_no, "status": "error", "error": "write failed"} for row_no, _ in batch]
+        events = []
+        for (row_no, payload), (status, error) in zip(batch, results):
+            if status == "failed":
+                events.append({"row": row_no, "status": "error", "error": f"job service: {error}"})
+            else:
+                events.append({"row": row_no, "status": status, "confirmation_code": payload.confirmation_code})
+        return events
+
+    async def _collect(
+        self, pending: Set[asyncio.Task], batch: List[Tuple[int, JobPayload]]
+    ) -> List[Dict[str, Any]]:
+        """Wait for at least one row; queue valid jobs in batch and return the other events."""
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        events = []
+        for task in done:
+            pending.discard(task)
+            row_no, result = task.result()
+            if isinstance(result, JobPayload):
+                batch.append((row_no, result))
+            else:
+                events.append(result)
+        return events
+
+    async def _run(self, row_no: int, row: Row, chat_id: str) -> Tuple[int, Any]:
+        try:
+            return await self._process(row_no, row, chat_id)
+        except Exception as exc:
+            logger.warning(f"Bulk row {row_no} failed: {exc}")
+            return row_no, {"row": row_no, "status": "error", "error": str(exc)}
+
+    async def ingest(self, rows: AsyncIterator[Tuple[int, Any]], chat_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields one progress event per row, in completion order, then a final summary.
+        Rows are pulled from the upload only as slots free up, so a large upload is read
+        at the pace extraction keeps up with.
+        """
+        pending: Set[asyncio.Task] = set()
+        batch: List[Tuple[int, JobPayload]] = []
+        totals: Counter = Counter()
+        self.active_uploads += 1
+
+        def tally(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            for event in events:
+                totals[event["status"]] += 1
+                self.counts[event["status"]] += 1
+            return events
+
+        try:
+            try:
+                async for row_no, row in rows:
+                    totals["rows"] += 1
+                    if not isinstance(row, dict):
+                        for event in tally([{"row": row_no, "status": "error", "error": row}]):
+                            yield event
+                        continue
+                    while len(pending) >= self.max_inflight:
+                        for event in tally(await self._collect(pending, batch)):
+                            yield event
+                    pending.add(asyncio.create_task(self._run(row_no, row, chat_id)))
+                    if len(batch) >= self.batch_size:
+                        for event in tally(await self._flush(batch)):
+                            yield event
+                        batch = []
+            except ValueError as exc:
+                # Unreadable upload: report it, but still finish the rows already read
+                yield {"status": "error", "error": str(exc)}
+                totals["upload_errors"] += 1
+            while pending:
+                for event in tally(await self._collect(pending, batch)):
+                    yield event
+                if len(batch) >= self.batch_size:
+                    for event in tally(await self._flush(batch)):
+                        yield event
+                    batch = []
+            for event in tally(await self._flush(batch)):
+                yield event
+            yield {"status": "done", **totals}
+        finally:
+            # Client went away mid-upload: stop work for rows nobody will hear about
+            for task in pending:
+                task.cancel()
+            self.active_uploads -= 1
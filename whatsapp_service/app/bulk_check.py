@@ -0,0 +1,138 @@
+"""
+End-to-end check of POST /jobs/bulk over a real HTTP server.
+
+Starts uvicorn on a free local port with a throwaway BULK_INGEST_TOKEN, then posts a
+chunked NDJSON upload and a Content-Length CSV upload, and checks that every row gets its
+own progress event before the `done` summary. Calling BulkIngestor directly skips the
+ASGI layer, where the request body and the streamed response share one receive channel.
+Exits non-zero on any failure.
+
+Usage:
+    python -m app.bulk_check [--rows 400] [--timeout 60]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+_TOKEN = "bulk-check"
+_FIELDS = {
+    "title": "Cashier",
+    "pay_rate": "$18",
+    "pay_type": "hourly",
+    "location": "123 Main St",
+    "shift_times": "Mon-Fri 4pm-10pm",
+    "contact_phone": "+15551234567",
+    "business_name": "Joes Diner",
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base: str, server: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}")
+        try:
+            if httpx.get(f"{base}/ready", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("server never became ready")
+
+
+def _post(base: str, content, content_type: str, timeout: float) -> List[Dict]:
+    with httpx.stream(
+        "POST",
+        f"{base}/jobs/bulk?agency=check",
+        content=content,
+        headers={"X-Bulk-Token": _TOKEN, "Content-Type": content_type},
+        timeout=timeout,
+    ) as resp:
+        resp.raise_for_status()
+        return [json.loads(line) for line in resp.iter_lines() if line.strip()]
+
+
+def _ndjson_chunks(rows: int) -> Iterator[bytes]:
+    # A generator body is sent with Transfer-Encoding: chunked
+    for i in range(rows):
+        yield (json.dumps({**_FIELDS, "title": f"Cashier {i}"}) + "\n").encode()
+
+
+def _csv_body(rows: int) -> bytes:
+    header = ",".join(_FIELDS)
+    lines = [",".join(f'"{v}"' for v in {**_FIELDS, "title": f"Cook {i}"}.values()) for i in range(rows)]
+    return ("\n".join([header] + lines) + "\n").encode()
+
+
+def _verify(name: str, events: List[Dict], rows: int) -> Optional[str]:
+    done = events[-1] if events else {}
+    per_row = [e for e in events if "row" in e]
+    published = sum(1 for e in per_row if e["status"] == "published")
+    print(f"{name:<16} {len(per_row)} row events, {published} published, summary {done}")
+    if done.get("status") != "done":
+        return f"{name}: no done summary"
+    if sorted(e["row"] for e in per_row) != list(range(1, rows + 1)) or published != rows:
+        return f"{name}: expected {rows} published rows"
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="POST /jobs/bulk against a live uvicorn server.")
+    parser.add_argument("--rows", type=int, default=400)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = {
+        **os.environ,
+        "LOAD_DOTENV": "0",
+        "BULK_INGEST_TOKEN": _TOKEN,
+        "PG_DSN": "",
+        "JOB_SERVICE_URL": "",
+        "OPENAI_API_KEY": "",
+    }
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=root,
+        env=env,
+    )
+    failures = []
+    try:
+        _wait_ready(base, server, args.timeout)
+        checks = [
+            ("ndjson chunked", _ndjson_chunks(args.rows), "application/x-ndjson", args.rows),
+            ("csv length", _csv_body(3), "text/csv", 3),
+        ]
+        for name, content, content_type, rows in checks:
+            try:
+                error = _verify(name, _post(base, content, content_type, args.timeout), rows)
+            except httpx.HTTPError as exc:
+                error = f"{name}: {exc!r}"
+            if error:
+                failures.append(error)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
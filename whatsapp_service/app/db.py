@@ -1,80 +1,395 @@
 import os
+import re
+import gzip
 import json
 import asyncio
+import logging
 import ssl
-from typing import Any, Dict, List, Optional
-import asyncpg
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from .schedule import PARSER_VERSION, WEEK_BITS, parse_shift, to_hex
+
+if TYPE_CHECKING:
+    import asyncpg
+
+# Ordered (version, DDL) steps. Append new steps; never edit applied ones.
+_MIGRATIONS: List[Tuple[int, str]] = [
+    (
+        1,
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id SERIAL PRIMARY KEY,
+            confirmation_code TEXT UNIQUE,
+            source_channel TEXT,
+            chat_id TEXT,
+            title TEXT NOT NULL,
+            pay_rate TEXT NOT NULL,
+            pay_type TEXT NOT NULL,
+            location TEXT NOT NULL,
+            shift_times TEXT NOT NULL,
+            contact_phone TEXT NOT NULL,
+            business_name TEXT NOT NULL,
+            business_type TEXT,
+            min_qualification TEXT,
+            description TEXT,
+            language_requirement TEXT,
+            images JSONB,
+            created_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+    ),
+    (
+        2,
+        """
+        CREATE INDEX IF NOT EXISTS jobs_source_created_idx
+            ON jobs (source_channel, created_at DESC);
+        """,
+    ),
+    (
+        3,
+        # Monthly range partitions on created_at. Unique constraints on a partitioned table
+        # must include the partition key, so confirmation_code uniqueness is per created_at
+        # and add_job guards duplicates explicitly.
+        """
+        ALTER TABLE jobs RENAME TO jobs_unpartitioned;
+        ALTER INDEX IF EXISTS jobs_source_created_idx RENAME TO jobs_unpartitioned_source_created_idx;
+        CREATE TABLE jobs (
+            id BIGSERIAL,
+            confirmation_code TEXT NOT NULL,
+            source_channel TEXT,
+            chat_id TEXT,
+            title TEXT NOT NULL,
+            pay_rate TEXT NOT NULL,
+            pay_type TEXT NOT NULL,
+            location TEXT NOT NULL,
+            shift_times TEXT NOT NULL,
+            contact_phone TEXT NOT NULL,
+            business_name TEXT NOT NULL,
+            business_type TEXT,
+            min_qualification TEXT,
+            description TEXT,
+            language_requirement TEXT,
+            images JSONB,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (id, created_at),
+            UNIQUE (confirmation_code, created_at)
+        ) PARTITION BY RANGE (created_at);
+        CREATE INDEX jobs_source_created_idx ON jobs (source_channel, created_at DESC);
+        CREATE INDEX jobs_created_idx ON jobs (created_at DESC);
+        DO $$
+        DECLARE m DATE;
+        BEGIN
+            FOR m IN
+                SELECT DISTINCT date_trunc('month', COALESCE(created_at, NOW()))::date FROM jobs_unpartitioned
+                UNION SELECT date_trunc('month', NOW())::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF jobs FOR VALUES FROM (%L) TO (%L)',
+                    'jobs_' || to_char(m, 'YYYYMM'), m, (m + INTERVAL '1 month')::date
+                );
+            END LOOP;
+        END $$;
+        INSERT INTO jobs (
+            id, confirmation_code, source_channel, chat_id,
+            title, pay_rate, pay_type, location, shift_times,
+            contact_phone, business_name, business_type,
+            min_qualification, description, language_requirement, images, created_at
+        )
+        SELECT
+            id, COALESCE(confirmation_code, 'LEGACY-' || id), source_channel, chat_id,
+            title, pay_rate, pay_type, location, shift_times,
+            contact_phone, business_name, business_type,
+            min_qualification, description, language_requirement, images,
+            COALESCE(created_at, NOW())
+        FROM jobs_unpartitioned;
+        SELECT setval(pg_get_serial_sequence('jobs', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM jobs;
+        DROP TABLE jobs_unpartitioned;
+        """,
+    ),
+    (
+        4,
+        # Change-feed cursor: bumped on every insert and update
+        """
+        CREATE SEQUENCE IF NOT EXISTS jobs_change_seq;
+        ALTER TABLE jobs ADD COLUMN IF NOT EXISTS seq BIGINT NOT NULL DEFAULT nextval('jobs_change_seq');
+        CREATE INDEX IF NOT EXISTS jobs_seq_idx ON jobs (seq);
+        """,
+    ),
+    (
+        5,
+        # Weekly availability bitmap parsed from shift_times (see app.schedule)
+        """
+        ALTER TABLE jobs ADD COLUMN IF NOT EXISTS shift_bits BIT(336);
+        """,
+    ),
+    (
+        6,
+        # Thumbnail URLs, aligned with images, written by the media pipeline
+        """
+        ALTER TABLE jobs ADD COLUMN IF NOT EXISTS thumbnails JSONB;
+        """,
+    ),
+    (
+        7,
+        # parse_shift version the stored shift_bits were computed with (see backfill_shift_bits)
+        """
+        ALTER TABLE schema_meta ADD COLUMN IF NOT EXISTS shift_parser INT NOT NULL DEFAULT 0;
+        """,
+    ),
+]
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+_MIGRATION_LOCK_ID = 7313001
+# Held from nextval('jobs_change_seq') to commit, so seqs commit in order (see _feed_write)
+_FEED_LOCK_ID = 7313002
+# Only one pod archives at a time; the others skip that maintenance round
+_ARCHIVE_LOCK_ID = 7313003
+_BACKFILL_LOCK_ID = 7313004
+_BACKFILL_BATCH = 1000
+
+# Seconds a replica is behind the primary; 0 when it has replayed everything it received
+# while still streaming. NULL when the WAL receiver is not streaming: a disconnected replica
+# has also replayed everything it received, but may be arbitrarily far behind.
+_REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN COALESCE((SELECT status FROM pg_stat_wal_receiver), '') <> 'streaming' THEN NULL
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END;
+"""
+
+_PARTITION_RE = re.compile(r"^jobs_(\d{4})(\d{2})$")
+_CODE_MONTH_RE = re.compile(r"^JOB-(\d{2})(\d{2})-")
+_ALL_TIME = (
+    datetime(2000, 1, 1, tzinfo=timezone.utc),
+    datetime(2100, 1, 1, tzinfo=timezone.utc),
+)
+
+logger = logging.getLogger("jobmatcher")
+
+
+def _add_months(year: int, month: int, n: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + n
+    return index // 12, index % 12 + 1
+
+
+def _code_window(confirmation_code: str) -> Tuple[datetime, datetime]:
+    """
+    created_at bounds implied by a JOB-YYMM-XXXXX code, padded a day for clock skew,
+    so lookups by code only touch one or two partitions.
+    """
+    m = _CODE_MONTH_RE.match(confirmation_code or "")
+    if not m:
+        return _ALL_TIME
+    year, month = 2000 + int(m.group(1)), int(m.group(2))
+    if not 1 <= month <= 12:
+        return _ALL_TIME
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(*_add_months(year, month, 1), 1, tzinfo=timezone.utc)
+    return start - timedelta(days=1), end + timedelta(days=1)
 
 
 class Database:
-    """Simple asyncpg wrapper for persisting jobs."""
+    """
+    Simple asyncpg wrapper for persisting jobs.
+    Writes go to the primary pool; reads are routed to replica pools (if any) whose
+    replication lag is within max_replica_lag seconds, falling back to the primary.
+    """
 
-    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 5):
+    def __init__(
+        self,
+        dsn: str,
+        min_size: int = 1,
+        max_size: int = 5,
+        read_dsns: Optional[List[str]] = None,
+    ):
         self.dsn = dsn
+        self.read_dsns = [d for d in (read_dsns or []) if d]
         self.min_size = min_size
         self.max_size = max_size
-        self.pool: Optional[asyncpg.pool.Pool] = None
+        self.pool: Optional["asyncpg.pool.Pool"] = None
+        self.read_pools: List[Tuple[str, "asyncpg.pool.Pool"]] = []
         self.sslmode = os.getenv("PG_SSLMODE", "require")
         self.connect_timeout = float(os.getenv("PG_CONNECT_TIMEOUT", "10"))
+        self.max_replica_lag = float(os.getenv("PG_MAX_REPLICA_LAG", "5"))
+        self.lag_check_interval = float(os.getenv("PG_LAG_CHECK_INTERVAL", "2"))
+        self.listing_ttl_days = float(os.getenv("JOB_LISTING_TTL_DAYS", "0"))
+        self._lag: Dict[str, Tuple[float, float]] = {}  # pool name -> (checked_at, lag)
+        self._next_replica = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
 
     async def connect(self) -> None:
+        names = ["primary"] + [f"replica-{i}" for i in range(len(self.read_dsns))]
+        pools = await asyncio.gather(
+            *(self._create_pool(dsn) for dsn in [self.dsn] + self.read_dsns),
+            return_exceptions=True,
+        )
+        if isinstance(pools[0], BaseException):
+            # Don't leak the replica pools that did connect
+            await asyncio.gather(
+                *(p.close() for p in pools[1:] if not isinstance(p, BaseException)),
+                return_exceptions=True,
+            )
+            raise pools[0]
+        self.pool = pools[0]
+        self._stats["primary"] = self._new_stats()
+        for name, pool in zip(names[1:], pools[1:]):
+            if isinstance(pool, BaseException):
+                # A missing replica only costs read capacity; the primary still serves reads.
+                logger.error(f"Failed to connect to Postgres {name}: {pool}")
+                continue
+            self.read_pools.append((name, pool))
+            self._stats[name] = self._new_stats()
+        async with self.pool.acquire() as conn:
+            await self._ensure_schema(conn)
+
+    async def _create_pool(self, dsn: str) -> "asyncpg.pool.Pool":
+        import asyncpg  # deferred: only needed when Postgres is configured
+
         ssl_ctx = None
         if self.sslmode and self.sslmode != "disable":
             ssl_ctx = ssl.create_default_context()
-        self.pool = await asyncpg.create_pool(
-            dsn=self.dsn,
+        return await asyncpg.create_pool(
+            dsn=dsn,
             min_size=self.min_size,
             max_size=self.max_size,
             timeout=self.connect_timeout,
             ssl=ssl_ctx,
         )
+
+    @staticmethod
+    def _new_stats() -> Dict[str, int]:
+        return {"reads": 0, "writes": 0, "errors": 0, "fallbacks": 0, "stale_skips": 0}
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-pool counters plus current pool size, idle connections and last measured lag."""
+        out: Dict[str, Dict[str, Any]] = {}
+        for name, pool in [("primary", self.pool)] + self.read_pools:
+            if pool is None:
+                continue
+            entry: Dict[str, Any] = dict(self._stats.get(name, {}))
+            entry["size"] = pool.get_size()
+            entry["idle"] = pool.get_idle_size()
+            if name in self._lag:
+                lag = self._lag[name][1]
+                # None: WAL receiver not streaming, lag unknown
+                entry["lag_seconds"] = round(lag, 3) if lag != float("inf") else None
+            out[name] = entry
+        return out
+
+    async def _replica_lag(self, name: str, pool: "asyncpg.pool.Pool") -> float:
+        now = time.monotonic()
+        cached = self._lag.get(name)
+        if cached and now - cached[0] < self.lag_check_interval:
+            return cached[1]
+        async with pool.acquire() as conn:
+            value = await conn.fetchval(_REPLICA_LAG_SQL)
+        lag = float("inf") if value is None else float(value)
+        self._lag[name] = (now, lag)
+        return lag
+
+    async def _fetch_read(self, query: str, *args: Any) -> List["asyncpg.Record"]:
+        """Run a read on the next fresh-enough replica, falling back to the primary."""
+        for _ in range(len(self.read_pools)):
+            name, pool = self.read_pools[self._next_replica % len(self.read_pools)]
+            self._next_replica += 1
+            try:
+                if await self._replica_lag(name, pool) > self.max_replica_lag:
+                    self._stats[name]["stale_skips"] += 1
+                    continue
+                async with pool.acquire() as conn:
+                    rows = await conn.fetch(query, *args)
+                self._stats[name]["reads"] += 1
+                return rows
+            except Exception as exc:  # noqa: BLE001
+                self._stats[name]["errors"] += 1
+                logger.warning(f"Read on {name} failed, trying next pool: {exc}")
+        if self.read_pools:
+            self._stats["primary"]["fallbacks"] += 1
         async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, *args)
+        self._stats["primary"]["reads"] += 1
+        return rows
+
+    async def _ensure_schema(self, conn: "asyncpg.Connection") -> None:
+        """Apply pending migrations; a single cheap read when the schema is current."""
+        if await self._schema_version(conn) >= SCHEMA_VERSION:
+            return
+        async with conn.transaction():
+            # Serialize concurrent pods booting against a fresh database
+            await conn.execute("SELECT pg_advisory_xact_lock($1);", _MIGRATION_LOCK_ID)
             await conn.execute(
                 """
-                CREATE TABLE IF NOT EXISTS jobs (
-                    id SERIAL PRIMARY KEY,
-                    confirmation_code TEXT UNIQUE,
-                    source_channel TEXT,
-                    chat_id TEXT,
-                    title TEXT NOT NULL,
-                    pay_rate TEXT NOT NULL,
-                    pay_type TEXT NOT NULL,
-                    location TEXT NOT NULL,
-                    shift_times TEXT NOT NULL,
-                    contact_phone TEXT NOT NULL,
-                    business_name TEXT NOT NULL,
-                    business_type TEXT,
-                    min_qualification TEXT,
-                    description TEXT,
-                    language_requirement TEXT,
-                    images JSONB,
-                    created_at TIMESTAMPTZ DEFAULT NOW()
+                CREATE TABLE IF NOT EXISTS schema_meta (
+                    id INT PRIMARY KEY DEFAULT 1,
+                    version INT NOT NULL
                 );
                 """
             )
+            current = await self._schema_version(conn)
+            for version, ddl in _MIGRATIONS:
+                if version > current:
+                    await conn.execute(ddl)
+            await conn.execute(
+                """
+                INSERT INTO schema_meta (id, version) VALUES (1, $1)
+                ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version;
+                """,
+                SCHEMA_VERSION,
+            )
+
+    async def _schema_version(self, conn: "asyncpg.Connection") -> int:
+        if not await conn.fetchval("SELECT to_regclass('schema_meta') IS NOT NULL;"):
+            return 0
+        return await conn.fetchval("SELECT version FROM schema_meta WHERE id = 1;") or 0
 
     async def close(self) -> None:
+        pools = [p for _, p in self.read_pools]
         if self.pool:
-            await self.pool.close()
+            pools.append(self.pool)
+        await asyncio.gather(*(p.close() for p in pools), return_exceptions=True)
 
-    async def add_job(self, payload: Dict[str, Any]) -> None:
+    @asynccontextmanager
+    async def _feed_write(self) -> AsyncIterator["asyncpg.Connection"]:
+        """
+        A transaction holding the change-feed lock until commit. Writers that draw a seq
+        inside it commit in seq order (across pods too), so a reader that has seen seq N
+        can never later find an earlier seq appearing behind its cursor.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock($1);", _FEED_LOCK_ID)
+                yield conn
+
+    async def add_job(self, payload: Dict[str, Any]) -> Optional[int]:
+        """Insert a job; returns its change-feed seq, or None if the code already exists."""
         if not self.pool:
-            return
+            return None
         images = payload.get("images") or []
-        async with self.pool.acquire() as conn:
-            await conn.execute(
+        window = _code_window(payload.get("confirmation_code"))
+        async with self._feed_write() as conn:
+            # Partitioned tables can't enforce a unique code alone; skip re-published codes
+            seq = await conn.fetchval(
                 """
                 INSERT INTO jobs (
                     confirmation_code, source_channel, chat_id,
                     title, pay_rate, pay_type, location, shift_times,
                     contact_phone, business_name, business_type,
-                    min_qualification, description, language_requirement, images
+                    min_qualification, description, language_requirement, images,
+                    shift_bits
                 )
-                VALUES (
+                SELECT
                     $1, $2, $3, $4, $5, $6, $7, $8,
-                    $9, $10, $11, $12, $13, $14, $15
+                    $9, $10, $11, $12, $13, $14, $15::jsonb,
+                    ('x' || $18::text)::bit(336)
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM jobs
+                    WHERE confirmation_code = $1 AND created_at >= $16 AND created_at < $17
                 )
-                ON CONFLICT (confirmation_code) DO NOTHING;
+                RETURNING seq;
                 """,
                 payload.get("confirmation_code"),
                 payload.get("source_channel"),
@@ -91,33 +406,296 @@ class Database:
                 payload.get("description"),
                 payload.get("language_requirement"),
                 json.dumps(images),
+                *window,
+                payload.get("shift_bits"),
+            )
+        self._stats["primary"]["writes"] += 1
+        return seq
+
+    async def add_jobs(self, payloads: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """Insert many jobs in one statement; returns seqs in input order (None where the code existed)."""
+        if not self.pool or not payloads:
+            return [None] * len(payloads)
+        columns = [
+            "confirmation_code", "source_channel", "chat_id",
+            "title", "pay_rate", "pay_type", "location", "shift_times",
+            "contact_phone", "business_name", "business_type",
+            "min_qualification", "description", "language_requirement",
+        ]
+        args: List[Any] = [[p.get(c) for p in payloads] for c in columns]
+        args.append([json.dumps(p.get("images") or []) for p in payloads])
+        windows = [_code_window(p.get("confirmation_code")) for p in payloads]
+        args.append([w[0] for w in windows])
+        args.append([w[1] for w in windows])
+        args.append([p.get("shift_bits") for p in payloads])
+        async with self._feed_write() as conn:
+            rows = await conn.fetch(
+                """
+                INSERT INTO jobs (
+                    confirmation_code, source_channel, chat_id,
+                    title, pay_rate, pay_type, location, shift_times,
+                    contact_phone, business_name, business_type,
+                    min_qualification, description, language_requirement, images,
+                    shift_bits
+                )
+                SELECT
+                    r.confirmation_code, r.source_channel, r.chat_id,
+                    r.title, r.pay_rate, r.pay_type, r.location, r.shift_times,
+                    r.contact_phone, r.business_name, r.business_type,
+                    r.min_qualification, r.description, r.language_requirement, r.images::jsonb,
+                    ('x' || r.shift_bits)::bit(336)
+                FROM unnest(
+                    $1::text[], $2::text[], $3::text[], $4::text[], $5::text[], $6::text[], $7::text[],
+                    $8::text[], $9::text[], $10::text[], $11::text[], $12::text[], $13::text[], $14::text[],
+                    $15::text[], $16::timestamptz[], $17::timestamptz[], $18::text[]
+                ) AS r(
+                    confirmation_code, source_channel, chat_id,
+                    title, pay_rate, pay_type, location, shift_times,
+                    contact_phone, business_name, business_type,
+                    min_qualification, description, language_requirement, images,
+                    window_start, window_end, shift_bits
+                )
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM jobs
+                    WHERE confirmation_code = r.confirmation_code
+                      AND created_at >= r.window_start AND created_at < r.window_end
+                )
+                RETURNING confirmation_code, seq;
+                """,
+                *args,
+            )
+        self._stats["primary"]["writes"] += 1
+        seqs = {row["confirmation_code"]: row["seq"] for row in rows}
+        return [seqs.get(p.get("confirmation_code")) for p in payloads]
+
+    async def update_images(self, confirmation_code: str, images: List[str], thumbnails: List[str]) -> None:
+        if not self.pool:
+            return
+        async with self._feed_write() as conn:
+            await conn.execute(
+                """
+                UPDATE jobs SET images = $2, thumbnails = $5, seq = nextval('jobs_change_seq')
+                WHERE confirmation_code = $1 AND created_at >= $3 AND created_at < $4;
+                """,
+                confirmation_code,
+                json.dumps(images),
+                *_code_window(confirmation_code),
+                json.dumps(thumbnails),
             )
+        self._stats["primary"]["writes"] += 1
 
-    async def list_jobs(self, source: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def list_jobs(
+        self,
+        source: Optional[str] = None,
+        available: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """List jobs, optionally only those whose shift bitmap overlaps `available`."""
         if not self.pool:
             return []
+        conditions: List[str] = []
+        args: List[Any] = []
+        if source:
+            args.append(source)
+            conditions.append(f"source_channel = ${len(args)}")
+        if available is not None:
+            args.append(to_hex(available))
+            conditions.append(
+                f"(shift_bits & ('x' || ${len(args)}::text)::bit({WEEK_BITS})) <> 0::bit({WEEK_BITS})"
+            )
+        if self.listing_ttl_days > 0:
+            # Expired postings are hidden; the bound also prunes old partitions
+            args.append(self.listing_ttl_days)
+            conditions.append(f"created_at >= NOW() - ${len(args)}::float8 * INTERVAL '1 day'")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = await self._fetch_read(
+            f"SELECT * FROM jobs {where} ORDER BY created_at DESC;",
+            *args,
+        )
+        return [self._row_to_dict(r) for r in rows]
+
+    async def get_job(self, confirmation_code: str) -> Optional[Dict[str, Any]]:
+        if not self.pool:
+            return None
+        query = """
+            SELECT * FROM jobs
+            WHERE confirmation_code = $1 AND created_at >= $2 AND created_at < $3;
+        """
+        window = _code_window(confirmation_code)
+        rows = await self._fetch_read(query, confirmation_code, *window)
+        if not rows and self.read_pools:
+            # Shared links are opened right after publishing; don't 404 on replica lag
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(query, confirmation_code, *window)
+        return self._row_to_dict(rows[0]) if rows else None
+
+    async def changes_since(self, cursor: int, limit: int = 500) -> Tuple[List[Dict[str, Any]], int]:
+        """Jobs inserted or updated after cursor in seq order, plus the cursor to resume from."""
+        if not self.pool:
+            return [], cursor
+        conditions = ["seq > $1"]
+        args: List[Any] = [cursor, limit]
+        if self.listing_ttl_days > 0:
+            args.append(self.listing_ttl_days)
+            conditions.append(f"created_at >= NOW() - ${len(args)}::float8 * INTERVAL '1 day'")
+        rows = await self._fetch_read(
+            f"SELECT * FROM jobs WHERE {' AND '.join(conditions)} ORDER BY seq LIMIT $2;",
+            *args,
+        )
+        jobs = [self._row_to_dict(r) for r in rows]
+        return jobs, (jobs[-1]["seq"] if jobs else cursor)
+
+    async def head_seq(self) -> int:
+        """Latest committed seq; a cursor for clients that only want changes from now on."""
+        if not self.pool:
+            return 0
+        rows = await self._fetch_read("SELECT COALESCE(MAX(seq), 0) AS seq FROM jobs;")
+        return rows[0]["seq"]
+
+    async def ensure_partitions(self, months_ahead: int = 1) -> None:
+        """Create monthly partitions for the current month and the next months_ahead."""
+        if not self.pool:
+            return
+        now = datetime.now(timezone.utc)
         async with self.pool.acquire() as conn:
-            if source:
-                rows = await conn.fetch(
+            for n in range(months_ahead + 1):
+                year, month = _add_months(now.year, now.month, n)
+                next_year, next_month = _add_months(year, month, 1)
+                await conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS jobs_{year:04d}{month:02d} PARTITION OF jobs
+                    FOR VALUES FROM ('{year:04d}-{month:02d}-01')
+                    TO ('{next_year:04d}-{next_month:02d}-01');
                     """
-                    SELECT * FROM jobs
-                    WHERE source_channel = $1
-                    ORDER BY created_at DESC;
-                    """,
-                    source,
                 )
-            else:
-                rows = await conn.fetch(
-                    "SELECT * FROM jobs ORDER BY created_at DESC;"
-                )
-        return [self._row_to_dict(r) for r in rows]
 
-    def _row_to_dict(self, row: asyncpg.Record) -> Dict[str, Any]:
-        d = dict(row)
-        # images is stored as jsonb; ensure list
-        if isinstance(d.get("images"), str):
+    async def backfill_shift_bits(self) -> int:
+        """
+        Re-parse shift_times into shift_bits for every job when the stored bitmaps predate
+        the current parse_shift (including rows from before shift_bits existed). Runs in
+        batches under an advisory lock, so one pod does it; returns the rows updated.
+        """
+        if not self.pool:
+            return 0
+        updated = 0
+        async with self.pool.acquire() as conn:
+            if await conn.fetchval("SELECT shift_parser FROM schema_meta WHERE id = 1;") == PARSER_VERSION:
+                return 0
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1);", _BACKFILL_LOCK_ID):
+                return 0
             try:
-                d["images"] = json.loads(d["images"])
-            except json.JSONDecodeError:
-                d["images"] = []
+                last = (0, _ALL_TIME[0])
+                while True:
+                    rows = await conn.fetch(
+                        """
+                        SELECT id, created_at, shift_times FROM jobs
+                        WHERE (id, created_at) > ($1, $2)
+                        ORDER BY id, created_at LIMIT $3;
+                        """,
+                        *last,
+                        _BACKFILL_BATCH,
+                    )
+                    if not rows:
+                        break
+                    bits = await asyncio.to_thread(
+                        lambda: [to_hex(parse_shift(r["shift_times"] or "")) for r in rows]
+                    )
+                    await conn.execute(
+                        f"""
+                        UPDATE jobs AS j SET shift_bits = ('x' || u.bits)::bit({WEEK_BITS})
+                        FROM unnest($1::bigint[], $2::timestamptz[], $3::text[]) AS u(id, created_at, bits)
+                        WHERE j.id = u.id AND j.created_at = u.created_at;
+                        """,
+                        [r["id"] for r in rows],
+                        [r["created_at"] for r in rows],
+                        bits,
+                    )
+                    updated += len(rows)
+                    last = (rows[-1]["id"], rows[-1]["created_at"])
+                await conn.execute("UPDATE schema_meta SET shift_parser = $1 WHERE id = 1;", PARSER_VERSION)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1);", _BACKFILL_LOCK_ID)
+        return updated
+
+    async def archive_expired(self, archive_dir: str, older_than_days: float) -> List[str]:
+        """
+        Stream every partition whose whole month is older than older_than_days to
+        <archive_dir>/<partition>.ndjson.gz, then detach it from jobs. Detached tables are
+        left in place so they can be dropped once the archive is copied somewhere durable.
+        Runs under an advisory lock; if another pod holds it, returns [] without archiving.
+        """
+        if not self.pool:
+            return []
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        archived: List[str] = []
+        async with self.pool.acquire() as conn:
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1);", _ARCHIVE_LOCK_ID):
+                return archived
+            try:
+                await self._archive_older(conn, cutoff, archive_dir, archived)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1);", _ARCHIVE_LOCK_ID)
+        return archived
+
+    async def _archive_older(
+        self, conn: "asyncpg.Connection", cutoff: datetime, archive_dir: str, archived: List[str]
+    ) -> None:
+        names = await conn.fetch(
+            """
+            SELECT c.relname, i.inhdetachpending FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'jobs'::regclass
+            ORDER BY c.relname;
+            """
+        )
+        for record in names:
+            name = record["relname"]
+            if record["inhdetachpending"]:
+                # An earlier concurrent detach was interrupted after archiving; finish it
+                await conn.execute(f"ALTER TABLE jobs DETACH PARTITION {name} FINALIZE;")
+                archived.append(name)
+                continue
+            m = _PARTITION_RE.match(name)
+            if not m:
+                continue
+            end = datetime(*_add_months(int(m.group(1)), int(m.group(2)), 1), 1, tzinfo=timezone.utc)
+            if end > cutoff:
+                continue
+            await self._archive_partition(conn, name, archive_dir)
+            # CONCURRENTLY (PG14+) avoids an ACCESS EXCLUSIVE lock on jobs, which would stall
+            # every read and publish while waiting; it must run outside a transaction block
+            await conn.execute(f"ALTER TABLE jobs DETACH PARTITION {name} CONCURRENTLY;")
+            archived.append(name)
+
+    async def _archive_partition(self, conn: "asyncpg.Connection", name: str, archive_dir: str) -> None:
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"{name}.ndjson.gz")
+        tmp = f"{path}.tmp"
+        fh = gzip.open(tmp, "wt", encoding="utf-8")
+        try:
+            batch: List[str] = []
+            async with conn.transaction():
+                async for row in conn.cursor(f"SELECT * FROM {name} ORDER BY created_at;", prefetch=500):
+                    batch.append(json.dumps(self._row_to_dict(row), default=str))
+                    if len(batch) >= 500:
+                        await asyncio.to_thread(fh.write, "\n".join(batch) + "\n")
+                        batch = []
+            if batch:
+                await asyncio.to_thread(fh.write, "\n".join(batch) + "\n")
+        finally:
+            fh.close()
+        os.replace(tmp, path)
+
+    def _row_to_dict(self, row: "asyncpg.Record") -> Dict[str, Any]:
+        d = dict(row)
+        # images and thumbnails are stored as jsonb; ensure lists
+        for key in ("images", "thumbnails"):
+            if isinstance(d.get(key), str):
+                try:
+                    d[key] = json.loads(d[key])
+                except json.JSONDecodeError:
+                    d[key] = []
+            elif d.get(key) is None and key in d:
+                d[key] = []
+        if d.get("shift_bits") is not None:
+            d["shift_bits"] = to_hex(d["shift_bits"].to_int())
         return d
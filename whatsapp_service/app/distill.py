@@ -0,0 +1,292 @@
+"""
+Distilled local field extractor.
+
+LLM extractions are logged as (message, fields) pairs; from them a token tagger (averaged
+perceptron over hashed features, pure Python, CPU-only) learns to label field spans.
+The LLM is only asked for some fields, so a logged pair may label just those (`asked`);
+tokens outside them are not taken as evidence that no other field is there.
+The trained model runs as an extraction tier between heuristics and the LLM.
+
+Offline usage:
+    python -m app.distill train extractions.ndjson model.json [--epochs 8] [--holdout 0.2]
+    python -m app.distill eval extractions.ndjson model.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import random
+import re
+import time
+import zlib
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .ai_parser import ALL_FIELDS
+
+logger = logging.getLogger("jobmatcher")
+
+OUTSIDE = "O"
+LABELS = [OUTSIDE] + ALL_FIELDS
+N_FEATURE_BITS = 20
+_FEATURE_MASK = (1 << N_FEATURE_BITS) - 1
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+MAX_CHARS = 4000
+
+Token = Tuple[str, int, int]  # (text, start, end)
+# (message, fields, asked); asked is None when every field was labelled
+Example = Tuple[str, Dict[str, str], Optional[List[str]]]
+
+
+def tokenize(text: str) -> List[Token]:
+    return [(m.group(0), m.start(), m.end()) for m in _TOKEN_RE.finditer(text[:MAX_CHARS])]
+
+
+def _shape(word: str) -> str:
+    shape = re.sub(r"[A-Z]", "X", word)
+    shape = re.sub(r"[a-z]", "x", shape)
+    shape = re.sub(r"\d", "d", shape)
+    return re.sub(r"(.)\1{2,}", r"\1\1", shape)
+
+
+def _features(tokens: List[Token], i: int, prev_label: str) -> List[int]:
+    def word(j: int) -> str:
+        return tokens[j][0].lower() if 0 <= j < len(tokens) else "<pad>"
+
+    w = word(i)
+    feats = [
+        "bias",
+        f"w={w}",
+        f"p3={w[:3]}",
+        f"s3={w[-3:]}",
+        f"sh={_shape(tokens[i][0])}",
+        f"w-1={word(i - 1)}",
+        f"w-2={word(i - 2)}",
+        f"w+1={word(i + 1)}",
+        f"w+2={word(i + 2)}",
+        f"w-1,w={word(i - 1)},{w}",
+        f"pl={prev_label}",
+        f"pl,w={prev_label},{w}",
+    ]
+    # Stable across processes, unlike hash()
+    return [zlib.crc32(f.encode("utf-8")) & _FEATURE_MASK for f in feats]
+
+
+def align_labels(text: str, tokens: List[Token], fields: Dict[str, str]) -> List[str]:
+    """Project field values onto token labels; values not found verbatim are ignored."""
+    labels = [OUTSIDE] * len(tokens)
+    lowered = text[:MAX_CHARS].lower()
+    for field in ALL_FIELDS:
+        value = (fields.get(field) or "").strip().lower()
+        if not value:
+            continue
+        start = lowered.find(value)
+        if start < 0:
+            continue
+        end = start + len(value)
+        for idx, (_, t_start, t_end) in enumerate(tokens):
+            if t_start >= start and t_end <= end and labels[idx] == OUTSIDE:
+                labels[idx] = field
+    return labels
+
+
+class LocalExtractor:
+    """Greedy left-to-right token tagger with a sparse linear model."""
+
+    def __init__(self, weights: Optional[Dict[int, Dict[str, float]]] = None):
+        self.weights: Dict[int, Dict[str, float]] = weights if weights is not None else {}
+
+    def _scores(self, feats: List[int]) -> Dict[str, float]:
+        scores = dict.fromkeys(LABELS, 0.0)
+        for f in feats:
+            for label, w in self.weights.get(f, {}).items():
+                scores[label] += w
+        return scores
+
+    def tag(self, tokens: List[Token]) -> List[Tuple[str, float]]:
+        """Returns (label, probability) per token."""
+        out: List[Tuple[str, float]] = []
+        prev = "<s>"
+        for i in range(len(tokens)):
+            scores = self._scores(_features(tokens, i, prev))
+            best = max(LABELS, key=lambda label: scores[label])
+            top = scores[best]
+            norm = sum(math.exp(v - top) for v in scores.values())
+            out.append((best, 1.0 / norm))
+            prev = best
+        return out
+
+    def extract(self, text: str) -> Dict[str, Tuple[str, float]]:
+        """Returns {field: (value, confidence)}, keeping the most confident span per field."""
+        tokens = tokenize(text)
+        tags = self.tag(tokens)
+        found: Dict[str, Tuple[str, float]] = {}
+        i = 0
+        while i < len(tags):
+            label = tags[i][0]
+            j = i
+            while j + 1 < len(tags) and tags[j + 1][0] == label:
+                j += 1
+            if label != OUTSIDE:
+                conf = sum(p for _, p in tags[i : j + 1]) / (j - i + 1)
+                if conf > found.get(label, ("", 0.0))[1]:
+                    found[label] = (text[tokens[i][1] : tokens[j][2]], conf)
+            i = j + 1
+        return found
+
+    def save(self, path: str) -> None:
+        data = {
+            "labels": LABELS,
+            "feature_bits": N_FEATURE_BITS,
+            "weights": {str(f): w for f, w in self.weights.items()},
+        }
+        with open(path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalExtractor":
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        if data.get("labels") != LABELS or data.get("feature_bits") != N_FEATURE_BITS:
+            raise ValueError(f"{path} was trained with a different label or feature set")
+        return cls({int(f): w for f, w in data["weights"].items()})
+
+
+def train(examples: List[Example], epochs: int = 8, seed: int = 0) -> LocalExtractor:
+    """Averaged perceptron training on (message, fields) pairs."""
+    weights: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    totals: Dict[Tuple[int, str], float] = defaultdict(float)
+    stamps: Dict[Tuple[int, str], int] = defaultdict(int)
+    step = 0
+
+    def update(f: int, label: str, delta: float) -> None:
+        key = (f, label)
+        totals[key] += (step - stamps[key]) * weights[f][label]
+        stamps[key] = step
+        weights[f][label] += delta
+
+    data = [(tokenize(text), text, fields, asked) for text, fields, asked in examples]
+    data = [(tokens, align_labels(text, tokens, fields), asked) for tokens, text, fields, asked in data]
+    rng = random.Random(seed)
+    model = LocalExtractor(weights)
+    for _ in range(epochs):
+        rng.shuffle(data)
+        for tokens, gold, asked in data:
+            prev = "<s>"
+            for i in range(len(tokens)):
+                step += 1
+                feats = _features(tokens, i, prev)
+                scores = model._scores(feats)
+                guess = max(LABELS, key=lambda label: scores[label])
+                # With partial labels an unlabelled token may belong to a field nobody asked for
+                unknown = asked is not None and gold[i] == OUTSIDE and guess not in asked
+                if guess != gold[i] and not unknown:
+                    for f in feats:
+                        update(f, gold[i], 1.0)
+                        update(f, guess, -1.0)
+                prev = guess
+    averaged: Dict[int, Dict[str, float]] = {}
+    for f, per_label in weights.items():
+        kept = {}
+        for label, w in per_label.items():
+            key = (f, label)
+            total = totals[key] + (step - stamps[key]) * w
+            avg = round(total / max(step, 1), 4)
+            if avg:
+                kept[label] = avg
+        if kept:
+            averaged[f] = kept
+    return LocalExtractor(averaged)
+
+
+def evaluate(model: LocalExtractor, examples: List[Example]) -> Dict[str, object]:
+    """
+    Per-field exact-match precision/recall against gold values that occur in the message;
+    partially labelled examples only count their asked fields.
+    """
+    counts = {f: {"tp": 0, "fp": 0, "fn": 0} for f in ALL_FIELDS}
+    elapsed = 0.0
+    for text, fields, asked in examples:
+        started = time.perf_counter()
+        predicted = model.extract(text)
+        elapsed += time.perf_counter() - started
+        lowered = text.lower()
+        for field in ALL_FIELDS if asked is None else asked:
+            gold = (fields.get(field) or "").strip().lower()
+            gold = gold if gold and gold in lowered else ""
+            guess = predicted.get(field, ("", 0.0))[0].strip().lower()
+            if guess and guess == gold:
+                counts[field]["tp"] += 1
+            else:
+                if guess:
+                    counts[field]["fp"] += 1
+                if gold:
+                    counts[field]["fn"] += 1
+    report: Dict[str, object] = {}
+    for field, c in counts.items():
+        precision = c["tp"] / (c["tp"] + c["fp"]) if c["tp"] + c["fp"] else 0.0
+        recall = c["tp"] / (c["tp"] + c["fn"]) if c["tp"] + c["fn"] else 0.0
+        report[field] = {"precision": round(precision, 3), "recall": round(recall, 3), **c}
+    report["messages"] = len(examples)
+    report["mean_us_per_message"] = round(elapsed / max(len(examples), 1) * 1e6, 1)
+    return report
+
+
+def log_example(path: str, text: str, fields: Dict[str, str], asked: Optional[List[str]] = None) -> None:
+    """
+    Append a (message, fields) training pair as one NDJSON line. With `asked`, only those
+    fields are kept and recorded as the labelled ones.
+    """
+    known = [f for f in (asked if asked is not None else ALL_FIELDS) if f in ALL_FIELDS]
+    record: Dict[str, object] = {"text": text, "fields": {k: fields[k] for k in known if fields.get(k)}}
+    if asked is not None:
+        record["asked"] = known
+    try:
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(record) + "\n")
+    except OSError as exc:
+        logger.warning(f"Could not log extraction example to {path}: {exc}")
+
+
+def load_examples(path: str) -> List[Example]:
+    examples = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            examples.append((record["text"], record.get("fields") or {}, record.get("asked")))
+    return examples
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train or evaluate the distilled field extractor.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_train = sub.add_parser("train")
+    p_train.add_argument("log")
+    p_train.add_argument("model")
+    p_train.add_argument("--epochs", type=int, default=8)
+    p_train.add_argument("--holdout", type=float, default=0.2)
+    p_train.add_argument("--seed", type=int, default=0)
+    p_eval = sub.add_parser("eval")
+    p_eval.add_argument("log")
+    p_eval.add_argument("model")
+    args = parser.parse_args(argv)
+
+    examples = load_examples(args.log)
+    if args.command == "train":
+        random.Random(args.seed).shuffle(examples)
+        cut = int(len(examples) * (1 - args.holdout))
+        model = train(examples[:cut], epochs=args.epochs, seed=args.seed)
+        model.save(args.model)
+        print(f"Trained on {cut} examples -> {args.model} ({os.path.getsize(args.model)} bytes)")
+        if examples[cut:]:
+            print(json.dumps(evaluate(model, examples[cut:]), indent=2))
+    else:
+        print(json.dumps(evaluate(LocalExtractor.load(args.model), examples), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Extraction tiers shared by the chat path (main._handle_message) and bulk ingestion.
+
+Local tiers run in extract_local: explicit fields, "Label: value" lines, scored heuristics
+for missing fields, then the distilled model for fields still below threshold. The LLM
+tier is left to the caller, which decides where and whether to spend a call, and merges
+its answer with apply_llm.
+"""
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from .ai_parser import ALL_FIELDS
+from .profiling import stage
+from .utils import LABELLED_CONFIDENCE, extract_with_confidence, normalize_phone, parse_bulk_message
+
+if TYPE_CHECKING:
+    from .distill import LocalExtractor
+
+Fields = Dict[str, str]
+Confidence = Dict[str, float]
+
+
+def normalize_contact(parsed: Fields, confidence: Confidence) -> None:
+    """Normalize contact_phone in place, dropping it if it is not a usable number."""
+    if "contact_phone" not in parsed:
+        return
+    phone = normalize_phone(parsed["contact_phone"])
+    if phone is None:
+        parsed.pop("contact_phone")
+        confidence.pop("contact_phone", None)
+    else:
+        parsed["contact_phone"] = phone
+
+
+def extract_local(
+    text: str,
+    required: List[str],
+    threshold: float,
+    model: Optional["LocalExtractor"] = None,
+    given: Optional[Fields] = None,
+) -> Tuple[Fields, Confidence]:
+    """
+    Returns (fields, confidence per field). `given` fields (e.g. CSV columns) win over
+    anything read from text; labelled lines score LABELLED_CONFIDENCE.
+    """
+    parsed: Fields = dict(given or {})
+    if text:
+        with stage("bulk_parse"):
+            labelled, _ = parse_bulk_message(text)
+        for k, v in labelled.items():
+            parsed.setdefault(k, v)
+    confidence: Confidence = {k: LABELLED_CONFIDENCE for k in parsed}
+    normalize_contact(parsed, confidence)
+    if not text:
+        return parsed, confidence
+
+    if any(not parsed.get(f) for f in required):
+        with stage("heuristic"):
+            scored = extract_with_confidence(text, threshold)
+        for k, (v, conf) in scored.items():
+            if v and k not in parsed:
+                parsed[k] = v
+                confidence[k] = conf
+        normalize_contact(parsed, confidence)
+
+    unsure = [f for f in required if confidence.get(f, 0.0) < threshold]
+    if unsure and model is not None:
+        with stage("distilled"):
+            predicted = model.extract(text)
+        for k, (v, conf) in predicted.items():
+            if k in unsure and v and conf > confidence.get(k, 0.0):
+                parsed[k] = v
+                confidence[k] = conf
+        normalize_contact(parsed, confidence)
+    return parsed, confidence
+
+
+def llm_fields(required: List[str], confidence: Confidence, llm_threshold: float) -> List[str]:
+    """
+    Fields to ask the LLM for. A call is only worth it for required fields missing or below
+    llm_threshold; once it is made, optional fields nothing else found ride along.
+    """
+    unsure = [f for f in required if confidence.get(f, 0.0) < llm_threshold]
+    if not unsure:
+        return []
+    return unsure + [f for f in ALL_FIELDS if f not in required and f not in confidence]
+
+
+def apply_llm(parsed: Fields, confidence: Confidence, llm: Fields, asked: List[str]) -> None:
+    """Merge LLM answers for the asked fields into parsed."""
+    for k in asked:
+        if llm.get(k):
+            parsed[k] = llm[k]
+            confidence[k] = LABELLED_CONFIDENCE
+    normalize_contact(parsed, confidence)
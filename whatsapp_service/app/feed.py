@@ -0,0 +1,69 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+# Delivered to a subscriber whose buffer overflowed; it must re-sync via /jobs/changes
+RESET = object()
+
+
+class Subscriber:
+    """One connected client with a bounded buffer of pending jobs."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.buffer: Deque[Dict[str, Any]] = deque()
+        self.overflowed = False
+        self._ready = asyncio.Event()
+
+    def push(self, item: Dict[str, Any]) -> None:
+        if self.overflowed:
+            return
+        if len(self.buffer) >= self.maxsize:
+            # A slow client gets a reset instead of holding unbounded memory
+            self.overflowed = True
+            self.buffer.clear()
+        else:
+            self.buffer.append(item)
+        self._ready.set()
+
+    async def get(self, timeout: float) -> Optional[Any]:
+        """Next job, RESET after an overflow, or None if nothing arrived within timeout."""
+        if not self.buffer and not self.overflowed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.overflowed:
+            return RESET
+        return self.buffer.popleft()
+
+
+class Broadcaster:
+    """In-process fan-out of newly published jobs to SSE clients."""
+
+    def __init__(self, buffer_size: int = 100):
+        self.buffer_size = buffer_size
+        self._subscribers: Set[Subscriber] = set()
+        self.published = 0
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(self.buffer_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._subscribers.discard(sub)
+
+    def publish(self, job: Dict[str, Any]) -> None:
+        self.published += 1
+        for sub in self._subscribers:
+            sub.push(job)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "overflowed": sum(1 for s in self._subscribers if s.overflowed),
+            "buffer_size": self.buffer_size,
+        }
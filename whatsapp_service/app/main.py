@@ -1,13 +1,23 @@
 import os
+import json
 import asyncio
+import hmac
 import logging
+import time
 from urllib.parse import parse_qs
-from fastapi import FastAPI, HTTPException, Request
+import anyio
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, Response
-from dotenv import load_dotenv
-from typing import Dict, Optional
-import httpx
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.requests import ClientDisconnect
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+# Load .env before importing modules that read configuration at import time
+if os.getenv("LOAD_DOTENV", "1") == "1":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
 from .storage import store
 from .models import (
     InboundMessage,
@@ -15,15 +25,15 @@ from .models import (
     SessionState,
     JobPayload,
     FormField,
+    ProfilingConfig,
 )
 from .state import SessionStore
 from .utils import (
     generate_confirmation_code,
     normalize_phone,
     is_yes,
-    parse_bulk_message,
-    heuristic_extract,
 )
+from .extraction import apply_llm, extract_local, llm_fields
 from .twilio_adapter import (
     parse_twilio_form,
     twiml_response,
@@ -31,8 +41,16 @@ from .twilio_adapter import (
 )
 from .ai_parser import llm_parse_free_text
 from .db import Database
+from .admission import AdmissionController, LoadShedder
+from .profiling import Profiler, stage
+from .feed import RESET, Broadcaster, Subscriber
+from .schedule import parse_shift, to_hex
+
+if TYPE_CHECKING:
+    from .bulk import BulkIngestor
+    from .distill import LocalExtractor
+    from .media import MediaPipeline
 
-load_dotenv()
 app = FastAPI(title="WhatsApp Integration Service", version="0.1.0")
 logger = logging.getLogger("jobmatcher")
 app.add_middleware(
@@ -51,25 +69,192 @@ JOB_SERVICE_TOKEN = os.getenv("JOB_SERVICE_TOKEN")
 JOB_SERVICE_TIMEOUT = float(os.getenv("JOB_SERVICE_TIMEOUT", "5.0"))
 JOB_SERVICE_RETRIES = int(os.getenv("JOB_SERVICE_RETRIES", "2"))
 PG_DSN = os.getenv("PG_DSN")
+PG_READ_DSN = os.getenv("PG_READ_DSN", "")
+PG_CONNECT_RETRY_MAX = float(os.getenv("PG_CONNECT_RETRY_MAX", "30"))
+PG_PUBLISH_WAIT = float(os.getenv("PG_PUBLISH_WAIT", "5"))
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
+MEDIA_DIR = os.getenv("MEDIA_DIR")
+MEDIA_BASE_URL = os.getenv("MEDIA_BASE_URL", "")
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "4"))
+MEDIA_THUMB_WORKERS = int(os.getenv("MEDIA_THUMB_WORKERS", "2"))
+MEDIA_MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", str(10 * 1024 * 1024)))
+MEDIA_ALLOWED_HOSTS = os.getenv("MEDIA_ALLOWED_HOSTS")
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DISTILLED_MODEL_PATH = os.getenv("DISTILLED_MODEL_PATH")
+EXTRACTION_LOG_PATH = os.getenv("EXTRACTION_LOG_PATH")
+EXTRACTION_CONFIDENCE_THRESHOLD = float(os.getenv("EXTRACTION_CONFIDENCE_THRESHOLD", "0.6"))
+# Lower bar for paying for an LLM call: only missing or very weak fields go to it
+LLM_CONFIDENCE_THRESHOLD = float(os.getenv("LLM_CONFIDENCE_THRESHOLD", "0.4"))
+REQUIRED_FIELDS = [
+    FormField.title,
+    FormField.pay_rate,
+    FormField.pay_type,
+    FormField.location,
+    FormField.shift_times,
+    FormField.contact_phone,
+    FormField.business_name,
+]
+BUSY_MESSAGE = "We're receiving a lot of messages right now. Please try again in a minute."
+admission = AdmissionController(
+    per_chat_rate=float(os.getenv("RATE_LIMIT_PER_CHAT", "20")) / 60.0,
+    per_chat_burst=float(os.getenv("RATE_LIMIT_PER_CHAT_BURST", "5")),
+    global_rate=float(os.getenv("RATE_LIMIT_GLOBAL", "50")),
+    global_burst=float(os.getenv("RATE_LIMIT_GLOBAL_BURST", "100")),
+)
+llm_shedder = LoadShedder(
+    max_inflight=int(os.getenv("LLM_MAX_INFLIGHT", "8")),
+    max_latency=float(os.getenv("LLM_SHED_LATENCY", "5.0")),
+    cooldown=float(os.getenv("LLM_SHED_COOLDOWN", "30")),
+)
+JOB_ARCHIVE_AFTER_DAYS = float(os.getenv("JOB_ARCHIVE_AFTER_DAYS", "0"))
+JOB_ARCHIVE_DIR = os.getenv("JOB_ARCHIVE_DIR", "archive")
+DB_MAINTENANCE_INTERVAL = float(os.getenv("DB_MAINTENANCE_INTERVAL", "3600"))
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+SSE_RESYNC_SECONDS = float(os.getenv("SSE_RESYNC_SECONDS", "10"))
+feed = Broadcaster(int(os.getenv("SSE_CLIENT_BUFFER", "100")))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+BULK_INGEST_TOKEN = os.getenv("BULK_INGEST_TOKEN")
+BULK_WORKERS = int(os.getenv("BULK_WORKERS", "2"))
+BULK_MAX_INFLIGHT = int(os.getenv("BULK_MAX_INFLIGHT", "16"))
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "100"))
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "5000"))
+BULK_LLM_RATE = float(os.getenv("BULK_LLM_RATE", "30"))  # calls per minute
+BULK_LLM_BURST = float(os.getenv("BULK_LLM_BURST", "5"))
+profiler = Profiler(os.getenv("PROFILE_DIR", "profiles"), max_files=int(os.getenv("PROFILE_MAX_FILES", "200")))
 db: Optional[Database] = None
+media: Optional["MediaPipeline"] = None
+distilled: Optional["LocalExtractor"] = None
+bulk: Optional["BulkIngestor"] = None
+_db_task: Optional[asyncio.Task] = None
+_maintenance_task: Optional[asyncio.Task] = None
+_model_task: Optional[asyncio.Task] = None
 
 
 @app.on_event("startup")
 async def startup_event():
-    global db
+    global _db_task, _model_task
+    # Connect in the background so the pod starts serving immediately; /ready gates traffic.
     if PG_DSN:
-        db = Database(PG_DSN)
+        _db_task = asyncio.create_task(_connect_db())
+    if MEDIA_DIR:
+        await _start_media_pipeline()
+    if DISTILLED_MODEL_PATH:
+        # Also in the background: until it loads, messages skip the distilled tier
+        _model_task = asyncio.create_task(_load_distilled_model())
+    if BULK_INGEST_TOKEN:
+        _start_bulk_ingestor()
+
+
+async def _load_distilled_model() -> None:
+    global distilled
+    from .distill import LocalExtractor
+
+    try:
+        distilled = await asyncio.to_thread(LocalExtractor.load, DISTILLED_MODEL_PATH)
+        logger.info(f"Loaded distilled extractor from {DISTILLED_MODEL_PATH}")
+    except Exception as exc:
+        logger.error(f"Failed to load distilled extractor: {exc}")
+
+
+def _start_bulk_ingestor() -> None:
+    global bulk
+    from .bulk import BulkIngestor
+
+    bulk = BulkIngestor(
+        _publish_batch,
+        REQUIRED_FIELDS,
+        EXTRACTION_CONFIDENCE_THRESHOLD,
+        workers=BULK_WORKERS,
+        max_inflight=BULK_MAX_INFLIGHT,
+        batch_size=BULK_BATCH_SIZE,
+        llm=llm_parse_free_text,
+        llm_threshold=LLM_CONFIDENCE_THRESHOLD,
+        llm_rate=BULK_LLM_RATE / 60.0,
+        llm_burst=BULK_LLM_BURST,
+        shedder=llm_shedder,
+        model_path=DISTILLED_MODEL_PATH,
+        log_path=EXTRACTION_LOG_PATH,
+    )
+    bulk.start()
+
+
+async def _connect_db() -> None:
+    """Connect to Postgres, retrying with backoff until it succeeds; /ready stays 503 until then."""
+    global db, _maintenance_task
+    delay = 1.0
+    while True:
+        database = Database(PG_DSN, read_dsns=[d.strip() for d in PG_READ_DSN.split(",")])
         try:
-            await db.connect()
-            logger.info("Connected to Postgres")
+            await database.connect()
+            await database.ensure_partitions()
+            break
         except Exception as exc:
-            logger.error(f"Failed to connect to Postgres: {exc}")
-            db = None
+            logger.error(f"Failed to connect to Postgres: {exc}; retrying in {delay:.0f}s")
+            await database.close()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, PG_CONNECT_RETRY_MAX)
+    db = database
+    logger.info("Connected to Postgres")
+    _maintenance_task = asyncio.create_task(_db_maintenance_loop())
+
+
+async def _db_maintenance_loop() -> None:
+    """Keep upcoming monthly partitions created, shift bitmaps current and archive expired ones."""
+    while True:
+        try:
+            updated = await db.backfill_shift_bits()
+            if updated:
+                logger.info(f"Re-parsed shift_bits for {updated} jobs")
+        except Exception as exc:
+            logger.error(f"Shift bitmap backfill failed: {exc}")
+        await asyncio.sleep(DB_MAINTENANCE_INTERVAL)
+        try:
+            await db.ensure_partitions()
+            if JOB_ARCHIVE_AFTER_DAYS > 0:
+                archived = await db.archive_expired(JOB_ARCHIVE_DIR, JOB_ARCHIVE_AFTER_DAYS)
+                if archived:
+                    logger.info(f"Archived and detached partitions: {', '.join(archived)}")
+        except Exception as exc:
+            logger.error(f"Database maintenance failed: {exc}")
+
+
+async def _start_media_pipeline() -> None:
+    global media
+    from .media import TWILIO_MEDIA_HOSTS, MediaPipeline, MediaStore
+
+    account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+    media = MediaPipeline(
+        MediaStore(MEDIA_DIR),
+        on_ready=_on_media_ready,
+        base_url=MEDIA_BASE_URL,
+        workers=MEDIA_WORKERS,
+        thumb_workers=MEDIA_THUMB_WORKERS,
+        max_bytes=MEDIA_MAX_BYTES,
+        auth=(account_sid, auth_token) if account_sid and auth_token else None,
+        allowed_hosts=[h.strip().lower() for h in MEDIA_ALLOWED_HOSTS.split(",") if h.strip()]
+        if MEDIA_ALLOWED_HOSTS
+        else TWILIO_MEDIA_HOSTS,
+    )
+    await media.start()
+    logger.info(f"Media pipeline storing to {MEDIA_DIR}")
+
+
+async def _on_media_ready(confirmation_code: str, images: List[str], thumbnails: List[str]) -> None:
+    store.update_images(confirmation_code, images, thumbnails)
+    if db:
+        await db.update_images(confirmation_code, images, thumbnails)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    for task in (_db_task, _maintenance_task, _model_task):
+        if task and not task.done():
+            task.cancel()
+    if media:
+        await media.stop()
+    if bulk:
+        bulk.stop()
     if db:
         await db.close()
 
@@ -78,17 +263,228 @@ async def shutdown_event():
 async def health() -> Dict[str, str]:
     return {"status": "ok", "db": bool(db)}
 
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 while PG_DSN is set but Postgres is not connected yet."""
+    db_pending = bool(PG_DSN) and db is None
+    status = "starting" if db_pending else "ready"
+    return JSONResponse(
+        status_code=503 if db_pending else 200,
+        content={"status": status, "db": bool(db)},
+    )
+
+@app.get("/metrics")
+async def metrics():
+    """Operational counters as JSON."""
+    return {
+        "db": db.stats() if db else {},
+        "admission": admission.stats(),
+        "llm": llm_shedder.stats(),
+        "feed": feed.stats(),
+        "bulk": bulk.stats() if bulk else {},
+    }
+
+
 @app.get("/jobs")
-async def list_jobs(source: Optional[str] = None):
-    """Return jobs from Postgres if configured, otherwise in-memory."""
+async def list_jobs(source: Optional[str] = None, available: Optional[str] = None):
+    """
+    Return jobs from Postgres if configured, otherwise in-memory.
+    `available` is free-text availability (e.g. "weekends after 5pm"); only jobs whose shifts overlap it are returned.
+    """
+    mask = None
+    if available:
+        mask = parse_shift(available)
+        if not mask:
+            raise HTTPException(status_code=400, detail="Could not understand availability; try e.g. 'Mon-Fri 9am-5pm' or 'weekends'")
     if db:
-        return await db.list_jobs(source)
-    return store.all(source)
+        return await db.list_jobs(source, mask)
+    return store.all(source, mask)
+
+
+@app.get("/jobs/changes")
+async def job_changes(since: int = 0, limit: int = 500):
+    """
+    Jobs added or updated after the `since` cursor, in change order.
+    Resume with the returned cursor; `reset` means the cursor was too old and `jobs` is a full snapshot.
+    """
+    limit = max(1, min(limit, 1000))
+    jobs, cursor, reset = await _changes_since(since, limit)
+    return {"cursor": cursor, "jobs": jobs, "reset": reset, "more": len(jobs) == limit}
+
+
+@app.get("/jobs/stream")
+async def job_stream(
+    request: Request,
+    since: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """Server-sent events: one `job` event per newly published job, `reset` if the client fell behind."""
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)  # EventSource reconnect
+    sub = feed.subscribe()  # before catch-up so nothing published in between is missed
+    return StreamingResponse(
+        _sse_events(request, sub, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _changes_since(since: int, limit: int):
+    if db:
+        jobs, cursor = await db.changes_since(since, limit)
+        return jobs, cursor, False
+    return store.changes_since(since, limit)
+
+
+def _sse(event: str, job: Dict, cursor: int) -> str:
+    # id is the resume cursor (sent back as Last-Event-ID), not necessarily this job's seq
+    return f"id: {cursor}\nevent: {event}\ndata: {json.dumps(job, default=str)}\n\n"
+
+
+async def _sse_events(request: Request, sub: Subscriber, since: Optional[int]):
+    """
+    With Postgres, the resume cursor only advances through _changes_since, which also picks
+    up jobs published on other pods (every SSE_RESYNC_SECONDS). Local pushes are delivered
+    early but never move it, so a reconnect cannot skip a job another pod published.
+    """
+    reset = "event: reset\ndata: {}\n\n"
+    try:
+        if since is None:
+            cursor = await db.head_seq() if db else store.head_seq()
+        else:
+            jobs, cursor, stale = await _changes_since(since, 500)
+            if stale or len(jobs) == 500:
+                yield reset
+                return
+            for job in jobs:
+                yield _sse("job", job, cursor)
+        pushed: Set[int] = set()  # seqs pushed ahead of the cursor, not to be sent twice
+        synced = time.monotonic()
+        while not await request.is_disconnected():
+            if db and time.monotonic() - synced >= SSE_RESYNC_SECONDS:
+                jobs, cursor, stale = await _changes_since(cursor, 500)
+                if stale or len(jobs) == 500:
+                    yield reset
+                    return
+                for job in jobs:
+                    if job["seq"] not in pushed:
+                        yield _sse("job", job, cursor)
+                pushed = {seq for seq in pushed if seq > cursor}
+                synced = time.monotonic()
+            wait = min(SSE_KEEPALIVE_SECONDS, SSE_RESYNC_SECONDS) if db else SSE_KEEPALIVE_SECONDS
+            item = await sub.get(wait)
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            if item is RESET:
+                yield reset
+                return
+            if item["seq"] <= cursor or item["seq"] in pushed:
+                continue
+            if db:
+                pushed.add(item["seq"])
+            else:
+                cursor = item["seq"]  # single in-memory store: pushes are the whole feed
+            yield _sse("job", item, cursor)
+    finally:
+        feed.unsubscribe(sub)
+
+
+@app.post("/jobs/bulk")
+async def bulk_ingest(
+    request: Request,
+    format: Optional[str] = None,
+    agency: str = "bulk",
+    x_bulk_token: Optional[str] = Header(None),
+):
+    """
+    Streamed CSV or NDJSON upload of many postings (`format`, or inferred from Content-Type).
+    Responds with NDJSON: one progress event per row, then a `done` summary.
+    """
+    if not bulk:
+        raise HTTPException(status_code=404, detail="Not found")
+    _require_token(x_bulk_token, BULK_INGEST_TOKEN)
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if fmt not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    from .bulk import iter_rows
+
+    body_done = asyncio.Event()
+
+    async def body() -> AsyncIterator[bytes]:
+        async for chunk in request.stream():
+            yield chunk
+        body_done.set()
+
+    rows = iter_rows(body(), fmt, BULK_MAX_ROWS)
+    events = (json.dumps(event) + "\n" async for event in bulk.ingest(rows, agency))
+    return _UploadStreamingResponse(events, body_done, media_type="application/x-ndjson")
+
+
+class _UploadStreamingResponse(StreamingResponse):
+    """
+    Streams a response while the request body is still being read. StreamingResponse
+    listens for a disconnect on receive() for the whole response, which would swallow the
+    body messages the handler is still reading; here the listener only starts once the
+    body is done, and a disconnect mid-upload surfaces as ClientDisconnect from the reader.
+    """
+
+    def __init__(self, content: AsyncIterator[str], body_done: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_done = body_done
+
+    async def __call__(self, scope, receive, send) -> None:
+        async with anyio.create_task_group() as group:
+
+            async def watch() -> None:
+                await self.body_done.wait()
+                await self.listen_for_disconnect(receive)
+                group.cancel_scope.cancel()
+
+            group.start_soon(watch)
+            try:
+                await self.stream_response(send)
+            except ClientDisconnect:
+                logger.info("Bulk upload client disconnected mid-upload")
+            group.cancel_scope.cancel()
+
+
+@app.get("/jobs/{confirmation_code}")
+async def get_job(confirmation_code: str):
+    """Return a single job by confirmation code (shared `?ref=` links)."""
+    job = await db.get_job(confirmation_code) if db else None
+    if job is None:
+        job = store.get(confirmation_code)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/media/{name}")
+async def get_media(name: str):
+    """Serve locally ingested media; names are content hashes so they never change."""
+    path = media.store.path_for(name) if media else None
+    if not path or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(
+        path,
+        media_type=media.store.media_type(name),
+        headers={"Cache-Control": MEDIA_CACHE_CONTROL, "X-Content-Type-Options": "nosniff"},
+    )
 
 
 @app.post("/webhook", response_model=OutboundMessage)
 async def webhook(msg: InboundMessage):
-    outbound = await _handle_message(msg)
+    reason = admission.admit(msg.from_number)
+    if reason:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": BUSY_MESSAGE, "limit": reason},
+            headers={"Retry-After": str(admission.retry_after(msg.from_number, reason))},
+        )
+    with profiler.request("webhook", msg.from_number):
+        outbound = await _handle_message(msg)
     return JSONResponse(status_code=200, content=outbound.dict())
 
 
@@ -104,11 +500,48 @@ async def twilio_webhook(request: Request):
         validate_twilio_request(auth_token, request, form_dict)
 
     inbound = parse_twilio_form(form_dict)
-    outbound = await _handle_message(inbound)
+    if admission.admit(inbound.from_number):
+        # Reply with TwiML rather than 429 so the sender gets a message instead of silence
+        return Response(content=twiml_response(BUSY_MESSAGE), media_type="application/xml")
+    with profiler.request("twilio", inbound.from_number):
+        outbound = await _handle_message(inbound)
     xml = twiml_response(outbound.message)
     return Response(content=xml, media_type="application/xml")
 
 
+def _require_admin(token: Optional[str]) -> None:
+    _require_token(token, ADMIN_TOKEN)
+
+
+def _require_token(token: Optional[str], expected: Optional[str]) -> None:
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Invalid token")
+
+
+@app.get("/admin/profiling")
+async def get_profiling(x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    return {**profiler.status(), "files": profiler.list_files()}
+
+
+@app.post("/admin/profiling")
+async def set_profiling(config: ProfilingConfig, x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    profiler.configure(config.enabled, config.sample_rate, config.chat_id, config.interval_ms)
+    return profiler.status()
+
+
+@app.get("/admin/profiling/{name}")
+async def download_profile(name: str, x_admin_token: Optional[str] = Header(None)):
+    _require_admin(x_admin_token)
+    path = profiler.path_for(name)
+    if not path or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, filename=name)
+
+
 async def _handle_message(msg: InboundMessage) -> OutboundMessage:
     chat_id = msg.from_number
     session = sessions.get(chat_id)
@@ -132,10 +565,12 @@ async def _handle_message(msg: InboundMessage) -> OutboundMessage:
     # Handle confirm/yes after summary
     if session.state == SessionState.review and is_yes(msg.text_lower):
         payload = _build_job_payload(session, chat_id)
-        ok, publish_msg = await publish_job(payload)
+        with stage("publish"):
+            ok, publish_msg = await publish_job(payload)
         if ok:
             code = payload.confirmation_code
-            store.add(payload)  # also keep locally for demo feed
+            if media:
+                media.submit(code, payload.images)
             sessions.end(chat_id)
             link = f"{FRONTEND_URL}?ref={code}"
             return OutboundMessage(
@@ -169,45 +604,28 @@ async def _handle_message(msg: InboundMessage) -> OutboundMessage:
 
     # Bulk single-message collection path
     if session.bulk_expected and session.state == SessionState.collecting and msg.text:
-        parsed, missing = parse_bulk_message(msg.text)
-        if "contact_phone" in parsed:
-            phone = normalize_phone(parsed["contact_phone"])
-            if phone is None:
-                missing = list(set(missing + ["contact_phone"]))
-            else:
-                parsed["contact_phone"] = phone
-        if msg.media_urls:
-            parsed.setdefault("images", []).extend(msg.media_urls)
+        # CPU-bound (the distilled model alone can take ~100ms); keep it off the event loop
+        parsed, confidence = await asyncio.to_thread(
+            extract_local, msg.text, REQUIRED_FIELDS, EXTRACTION_CONFIDENCE_THRESHOLD, model=distilled
+        )
 
-        # Heuristic extraction
-        if missing:
-            heur = heuristic_extract(msg.text)
-            for k, v in heur.items():
-                if v and k not in parsed:
-                    parsed[k] = v
-            if "contact_phone" in parsed:
-                phone = normalize_phone(parsed["contact_phone"])
-                if phone is None:
-                    missing = list(set(missing + ["contact_phone"]))
-                else:
-                    parsed["contact_phone"] = phone
-            missing = [f for f in ["title","pay_rate","pay_type","location","shift_times","contact_phone","business_name"] if f not in parsed or not parsed.get(f)]
-
-        # LLM extraction
-        if missing:
-            llm = llm_parse_free_text(msg.text)
+        # LLM extraction, asked only for missing or very low-confidence fields; skipped under load
+        unsure = llm_fields(REQUIRED_FIELDS, confidence, LLM_CONFIDENCE_THRESHOLD)
+        if unsure and llm_shedder.should_shed():
+            logger.warning(f"Shedding LLM extraction ({llm_shedder.state()}) for {chat_id}")
+        elif unsure:
+            with llm_shedder.track():
+                llm = await asyncio.to_thread(_llm_parse, msg.text, unsure)
             if llm:
-                for k, v in llm.items():
-                    if v and k not in parsed:
-                        parsed[k] = v
-                if "contact_phone" in parsed:
-                    phone = normalize_phone(parsed["contact_phone"])
-                    if phone is None:
-                        if "contact_phone" in parsed:
-                            parsed.pop("contact_phone", None)
-                    else:
-                        parsed["contact_phone"] = phone
-            missing = [f for f in ["title","pay_rate","pay_type","location","shift_times","contact_phone","business_name"] if f not in parsed or not parsed.get(f)]
+                apply_llm(parsed, confidence, llm, unsure)
+                if EXTRACTION_LOG_PATH:
+                    # Keep the LLM's answer as (partial) training data for the distilled extractor
+                    from .distill import log_example
+
+                    await asyncio.to_thread(log_example, EXTRACTION_LOG_PATH, msg.text, llm, unsure)
+        if msg.media_urls:
+            parsed.setdefault("images", []).extend(msg.media_urls)
+        missing = _missing_required(parsed)
 
         if missing:
             missing_list = ", ".join(missing)
@@ -246,6 +664,10 @@ async def _handle_message(msg: InboundMessage) -> OutboundMessage:
     return _advance_or_confirm(session, chat_id)
 
 
+def _missing_required(parsed: Dict[str, str]) -> List[str]:
+    return [f for f in REQUIRED_FIELDS if not parsed.get(f)]
+
+
 def _advance_or_confirm(session: SessionStore.Session, chat_id: str) -> OutboundMessage:
     session.advance()
     if session.state == SessionState.review:
@@ -290,6 +712,7 @@ def _build_job_payload(session: SessionStore.Session, chat_id: str) -> JobPayloa
         confirmation_code=confirmation_code,
         source_channel="wa",
         chat_id=chat_id,
+        shift_bits=to_hex(parse_shift(session.collected_payload.get(FormField.shift_times, ""))),
         **session.collected_payload,
     )
     return payload
@@ -300,29 +723,39 @@ async def publish_job(payload: JobPayload) -> (bool, str):
     POST job payload to Job Service.
     Returns (ok, message).
     """
+    if not await _db_ready():
+        return False, "database is not connected yet"
     if not JOB_SERVICE_URL:
         # No external job service configured; treat as success for local/demo storage.
-        if db:
-            await db.add_job(payload.dict())
+        await _record_published(payload)
         return True, "local-only"
+    ok, message = await _post_to_job_service(payload)
+    if ok:
+        await _record_published(payload)
+    return ok, message
+
+
+async def _post_to_job_service(payload: JobPayload) -> (bool, str):
+    """POST one job to JOB_SERVICE_URL with retries; the blocking request runs in a thread."""
     headers = {"Content-Type": "application/json"}
     if JOB_SERVICE_TOKEN:
         headers["Authorization"] = f"Bearer {JOB_SERVICE_TOKEN}"
+    import httpx
+
     body = payload.dict()
     attempt = 0
     last_error: Optional[str] = None
     while attempt <= JOB_SERVICE_RETRIES:
         attempt += 1
         try:
-            resp = httpx.post(
+            resp = await asyncio.to_thread(
+                httpx.post,
                 JOB_SERVICE_URL,
                 json=body,
                 headers=headers,
                 timeout=JOB_SERVICE_TIMEOUT,
             )
             if resp.status_code // 100 == 2:
-                if db:
-                    await db.add_job(payload.dict())
                 return True, "published"
             last_error = f"{resp.status_code} {resp.text}"
         except Exception as exc:  # noqa: BLE001
@@ -330,6 +763,74 @@ async def publish_job(payload: JobPayload) -> (bool, str):
     return False, last_error or "unknown error"
 
 
+async def _db_ready() -> bool:
+    """
+    False while PG_DSN is set but Postgres is still connecting, after waiting up to
+    PG_PUBLISH_WAIT seconds; jobs confirmed then must not land only in memory.
+    """
+    if not PG_DSN or db:
+        return True
+    if _db_task and not _db_task.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(_db_task), PG_PUBLISH_WAIT)
+        except asyncio.TimeoutError:
+            pass
+    return db is not None
+
+
+async def _record_published(payload: JobPayload) -> None:
+    """Store a published job and push it to feed subscribers."""
+    record = store.add(payload)  # also keep locally for demo feed
+    if db:
+        seq = await db.add_job(payload.dict())
+        if seq is None:
+            return  # code already stored by an earlier attempt
+        record = {**record, "seq": seq}
+    feed.publish(record)
+
+
+async def _publish_batch(payloads: List[JobPayload]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Bulk counterpart of publish_job: each job goes to the Job Service when configured, then
+    the accepted ones are stored with a single Postgres insert.
+    Returns (status, error) per payload; status is published, duplicate or failed.
+    """
+    if not await _db_ready():
+        raise RuntimeError("database is not connected yet")
+    if JOB_SERVICE_URL:
+        posted = await asyncio.gather(*(_post_to_job_service(p) for p in payloads))
+    else:
+        posted = [(True, "local-only")] * len(payloads)
+    accepted = [p for p, (ok, _) in zip(payloads, posted) if ok]
+    records: List[Optional[dict]] = [store.add(p) for p in accepted]
+    if db and accepted:
+        seqs = await db.add_jobs([p.dict() for p in accepted])
+        records = [{**r, "seq": seq} if seq is not None else None for r, seq in zip(records, seqs)]
+    stored = {}
+    for payload, record in zip(accepted, records):
+        stored[payload.confirmation_code] = record
+        if record is None:
+            continue
+        feed.publish(record)
+        if media:
+            media.submit(payload.confirmation_code, payload.images)
+    results: List[Tuple[str, Optional[str]]] = []
+    for payload, (ok, message) in zip(payloads, posted):
+        if not ok:
+            results.append(("failed", message))
+        elif stored[payload.confirmation_code] is None:
+            results.append(("duplicate", None))
+        else:
+            results.append(("published", None))
+    return results
+
+
+def _llm_parse(text: str, fields: List[str]) -> Dict[str, str]:
+    # The stage opens in the worker thread so the profiler samples the LLM call's stack
+    with stage("llm"):
+        return llm_parse_free_text(text, fields)
+
+
 def _validation_error(chat_id: str, session: SessionStore.Session, hint: str) -> OutboundMessage:
     return OutboundMessage(
         to=chat_id,
@@ -0,0 +1,281 @@
+import asyncio
+import hashlib
+import ipaddress
+import logging
+import mimetypes
+import os
+import re
+import socket
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Awaitable, Callable, List, Optional, Sequence, Tuple
+from urllib.parse import urljoin, urlsplit
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger("jobmatcher")
+
+_NAME_RE = re.compile(r"^[0-9a-f]{64}(?:\.thumb)?(?:\.[a-z0-9]{1,8})?$")
+_MAX_REDIRECTS = 5
+
+# Hosts media may be ingested from; subdomains match too. Credentials go only to AUTH_HOSTS.
+TWILIO_MEDIA_HOSTS = ("api.twilio.com", "media.twiliocdn.com")
+TWILIO_AUTH_HOSTS = ("api.twilio.com",)
+# Served from the API origin, so only raster images (no SVG, HTML or scripts) are stored
+MEDIA_TYPES = {"image/jpeg": ".jpg", "image/png": ".png", "image/gif": ".gif", "image/webp": ".webp"}
+
+
+def host_matches(host: str, allowed: Sequence[str]) -> bool:
+    host = (host or "").lower().rstrip(".")
+    return any(host == a or host.endswith(f".{a}") for a in allowed)
+
+
+def _is_public(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+async def resolves_public(host: str, port: int) -> bool:
+    """True only if every address host resolves to is publicly routable (no private, loopback or link-local)."""
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except OSError:
+        return False
+    return bool(infos) and all(_is_public(info[4][0]) for info in infos)
+
+
+def _write_atomic(path: str, write: Callable[[str], None]) -> None:
+    """
+    write(tmp) to a unique temp file next to path, then rename it into place. Concurrent
+    writers of the same content-addressed path each get their own temp file, and a path
+    that already exists counts as written.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        if os.path.exists(path):
+            return  # another writer stored the same content first
+        raise
+
+
+def make_thumbnail(src: str, dest: str, size: Tuple[int, int]) -> bool:
+    """
+    Writes a JPEG thumbnail of src to dest. Runs in a worker process.
+    Returns False if Pillow is not installed or the file is not an image.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return False
+    try:
+        with Image.open(src) as img:
+            img.thumbnail(size)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            _write_atomic(dest, lambda tmp: img.save(tmp, "JPEG", quality=80, optimize=True))
+        return True
+    except Exception:
+        return False
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+class MediaStore:
+    """Content-addressed media files on local disk or a mounted volume."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, name: str) -> Optional[str]:
+        """Returns the on-disk path for a stored name, or None if the name is invalid."""
+        if not _NAME_RE.match(name or ""):
+            return None
+        return os.path.join(self.root, name[:2], name)
+
+    @staticmethod
+    def thumb_name(name: str) -> str:
+        return f"{name[:64]}.thumb.jpg"
+
+    @staticmethod
+    def media_type(name: str) -> str:
+        """Content type to serve a stored name with; anything unexpected is an opaque download."""
+        guessed = mimetypes.guess_type(name)[0]
+        return guessed if guessed in MEDIA_TYPES else "application/octet-stream"
+
+    def put(self, data: bytes, content_type: str) -> Optional[str]:
+        """
+        Stores data under its sha256 digest; identical content is written once. Returns
+        None, storing nothing, unless content_type is one of MEDIA_TYPES.
+        """
+        mime = (content_type or "").split(";")[0].strip().lower()
+        if mime not in MEDIA_TYPES:
+            return None
+        name = f"{hashlib.sha256(data).hexdigest()}{MEDIA_TYPES[mime]}"
+        path = self.path_for(name)
+        if not os.path.exists(path):
+            _write_atomic(path, lambda tmp: _write_bytes(tmp, data))
+        return name
+
+
+class MediaPipeline:
+    """
+    Background ingestion of job media: fetches remote URLs with a bounded worker pool,
+    stores them content-addressed, builds thumbnails in a process pool, then hands the
+    rewritten local URLs to on_ready(confirmation_code, images, thumbnails).
+    Only https URLs on allowed_hosts are fetched, and every hop (including redirects) must
+    resolve to a public address; auth is sent only to auth_hosts.
+    """
+
+    def __init__(
+        self,
+        store: MediaStore,
+        on_ready: Callable[[str, List[str], List[str]], Awaitable[None]],
+        base_url: str = "",
+        workers: int = 4,
+        thumb_workers: int = 2,
+        thumb_size: Tuple[int, int] = (320, 320),
+        fetch_timeout: float = 10.0,
+        max_bytes: int = 10 * 1024 * 1024,
+        auth: Optional[Tuple[str, str]] = None,
+        allowed_hosts: Sequence[str] = TWILIO_MEDIA_HOSTS,
+        auth_hosts: Sequence[str] = TWILIO_AUTH_HOSTS,
+    ):
+        self.store = store
+        self.on_ready = on_ready
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.thumb_workers = thumb_workers
+        self.thumb_size = thumb_size
+        self.fetch_timeout = fetch_timeout
+        self.max_bytes = max_bytes
+        self.auth = auth
+        self.allowed_hosts = allowed_hosts
+        self.auth_hosts = auth_hosts
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._procs: Optional[ProcessPoolExecutor] = None
+        self._fetch_slots: Optional[asyncio.Semaphore] = None
+
+    def local_url(self, name: str) -> str:
+        return f"{self.base_url}/media/{name}"
+
+    async def start(self) -> None:
+        import httpx
+
+        os.makedirs(self.store.root, exist_ok=True)
+        # Redirects are followed by hand so each hop is checked and credentials never follow them
+        self._client = httpx.AsyncClient(timeout=self.fetch_timeout, follow_redirects=False)
+        self._procs = ProcessPoolExecutor(max_workers=self.thumb_workers)
+        self._fetch_slots = asyncio.Semaphore(self.workers)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._client:
+            await self._client.aclose()
+        if self._procs:
+            self._procs.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, confirmation_code: str, urls: List[str]) -> None:
+        if urls:
+            self.queue.put_nowait((confirmation_code, list(urls)))
+
+    async def _worker(self) -> None:
+        while True:
+            code, urls = await self.queue.get()
+            try:
+                results = await asyncio.gather(*(self._ingest(u) for u in urls))
+                images = [image for image, _ in results]
+                if images != urls:
+                    await self.on_ready(code, images, [thumb for _, thumb in results])
+            except Exception as exc:  # noqa: BLE001
+                logger.error(f"Media ingestion failed for {code}: {exc}")
+            finally:
+                self.queue.task_done()
+
+    async def _ingest(self, url: str) -> Tuple[str, str]:
+        """
+        Returns (image_url, thumbnail_url) for url. Either is url unchanged if it could not be
+        ingested or no thumbnail could be built.
+        """
+        if url.startswith(f"{self.base_url}/media/"):
+            return url, url
+        if not host_matches(urlsplit(url).hostname, self.allowed_hosts):
+            logger.warning(f"Media host not allowed, not fetching {url}")
+            return url, url
+        async with self._fetch_slots:
+            data, content_type = await self._fetch(url)
+        if data is None:
+            return url, url
+        loop = asyncio.get_running_loop()
+        name = await loop.run_in_executor(None, self.store.put, data, content_type)
+        if name is None:
+            logger.warning(f"Media at {url} is {content_type or 'untyped'}, not an image; not storing it")
+            return url, url
+        thumb = name
+        src = self.store.path_for(name)
+        dest = self.store.path_for(self.store.thumb_name(name))
+        built = os.path.exists(dest)
+        if not built:
+            built = await loop.run_in_executor(self._procs, make_thumbnail, src, dest, self.thumb_size)
+        if built:
+            thumb = self.store.thumb_name(name)
+        return self.local_url(name), self.local_url(thumb)
+
+    async def _allowed_hop(self, url: str) -> bool:
+        parts = urlsplit(url)
+        if parts.scheme != "https" or not parts.hostname:
+            return False
+        return await resolves_public(parts.hostname, parts.port or 443)
+
+    async def _fetch(self, url: str) -> Tuple[Optional[bytes], str]:
+        try:
+            for _ in range(_MAX_REDIRECTS + 1):
+                if not await self._allowed_hop(url):
+                    logger.warning(f"Media URL {url} is not a public https address; skipping")
+                    return None, ""
+                auth = self.auth if host_matches(urlsplit(url).hostname, self.auth_hosts) else None
+                # Twilio media redirects to a signed storage URL, which needs no credentials
+                async with self._client.stream("GET", url, auth=auth) as resp:
+                    if resp.is_redirect:
+                        url = urljoin(url, resp.headers.get("Location", ""))
+                        continue
+                    return await self._read(url, resp)
+            logger.warning(f"Media fetch {url} redirected too many times")
+            return None, ""
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(f"Media fetch {url} failed: {exc}")
+            return None, ""
+
+    async def _read(self, url: str, resp: "httpx.Response") -> Tuple[Optional[bytes], str]:
+        if resp.status_code != 200:
+            logger.warning(f"Media fetch {url} returned {resp.status_code}")
+            return None, ""
+        chunks = []
+        total = 0
+        async for chunk in resp.aiter_bytes():
+            total += len(chunk)
+            if total > self.max_bytes:
+                logger.warning(f"Media {url} exceeds {self.max_bytes} bytes; skipping")
+                return None, ""
+            chunks.append(chunk)
+        return b"".join(chunks), resp.headers.get("Content-Type", "")
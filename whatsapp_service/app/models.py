@@ -59,3 +59,12 @@ class JobPayload(BaseModel):
     description: Optional[str] = None
     language_requirement: Optional[str] = None
     images: List[str] = Field(default_factory=list)
+    thumbnails: List[str] = Field(default_factory=list)  # one per image, set by the media pipeline
+    shift_bits: Optional[str] = None  # hex weekly bitmap, see app.schedule
+
+
+class ProfilingConfig(BaseModel):
+    enabled: bool
+    sample_rate: float = 0.0
+    chat_id: Optional[str] = None
+    interval_ms: float = 5.0
@@ -0,0 +1,236 @@
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("jobmatcher")
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+_NAME_RE = re.compile(r"^[\w.-]+\.(?:folded|json)$")
+
+
+class RequestProfile:
+    """
+    Stage timings plus sampled stacks for one request: the event-loop thread throughout, and
+    any worker thread while it runs one of the request's stages (the contextvar is copied
+    into asyncio.to_thread, so stage() there registers the thread).
+    """
+
+    def __init__(self, endpoint: str, chat_id: str, interval: float):
+        self.endpoint = endpoint
+        self.chat_id = chat_id
+        self.interval = interval
+        self.stages: List[Dict[str, Any]] = []
+        self.samples: Counter = Counter()
+        self._thread_id = threading.get_ident()
+        # Sampled threads: ident -> (stack root label, open stages on it)
+        self._threads: Dict[int, Tuple[str, int]] = {self._thread_id: ("loop", 1)}
+        self._threads_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+
+    def _sample(self) -> None:
+        # Samples whatever the loop thread runs, so overlapping requests share its stacks
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._threads_lock:
+                threads = [(ident, label) for ident, (label, _) in self._threads.items()]
+            for ident, label in threads:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if stack:
+                    stack.append(label)
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def _enter_thread(self) -> Optional[int]:
+        ident = threading.get_ident()
+        if ident == self._thread_id:
+            return None
+        with self._threads_lock:
+            label, depth = self._threads.get(ident, (threading.current_thread().name, 0))
+            self._threads[ident] = (label, depth + 1)
+        return ident
+
+    def _exit_thread(self, ident: Optional[int]) -> None:
+        if ident is None:
+            return
+        with self._threads_lock:
+            label, depth = self._threads[ident]
+            if depth > 1:
+                self._threads[ident] = (label, depth - 1)
+            else:
+                del self._threads[ident]
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+        self.wall_ms = (time.perf_counter() - self._wall) * 1000
+        self.cpu_ms = (time.thread_time() - self._cpu) * 1000
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        ident = self._enter_thread()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self._exit_thread(ident)
+            self.stages.append(
+                {
+                    "name": name,
+                    "wall_ms": round((time.perf_counter() - wall) * 1000, 3),
+                    # CPU of the thread the stage ran on; a stage that awaits also counts
+                    # whatever else the event loop ran in the meantime
+                    "cpu_ms": round((time.thread_time() - cpu) * 1000, 3),
+                }
+            )
+
+
+class Profiler:
+    """
+    Runtime-switchable request profiler. When disabled, request() and stage() return a
+    shared no-op context manager. At most max_concurrent requests are profiled at once.
+    Profiles are written by a background thread, keeping only the newest max_files.
+    """
+
+    def __init__(self, out_dir: str, max_concurrent: int = 1, max_files: int = 200):
+        self.out_dir = out_dir
+        self.max_concurrent = max_concurrent
+        self.max_files = max_files
+        self.enabled = False
+        self.sample_rate = 0.0
+        self.chat_id: Optional[str] = None
+        self.interval = 0.005
+        self._active = 0
+        self._lock = threading.Lock()
+        # One writer keeps file creation and pruning in order, off the event loop
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-writer")
+
+    def configure(
+        self,
+        enabled: bool,
+        sample_rate: float = 0.0,
+        chat_id: Optional[str] = None,
+        interval_ms: float = 5.0,
+    ) -> None:
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.chat_id = chat_id or None
+        self.interval = max(interval_ms, 1.0) / 1000
+        self.enabled = enabled
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "chat_id": self.chat_id,
+            "interval_ms": self.interval * 1000,
+            "active": self._active,
+            "out_dir": self.out_dir,
+            "max_files": self.max_files,
+        }
+
+    def request(self, endpoint: str, chat_id: str) -> ContextManager[None]:
+        if not self.enabled:
+            return nullcontext()
+        if self.chat_id is not None:
+            if chat_id != self.chat_id:
+                return nullcontext()
+        elif random.random() >= self.sample_rate:
+            return nullcontext()
+        with self._lock:
+            if self._active >= self.max_concurrent:
+                return nullcontext()
+            self._active += 1
+        return self._profile(endpoint, chat_id)
+
+    @contextmanager
+    def _profile(self, endpoint: str, chat_id: str) -> Iterator[None]:
+        profile = RequestProfile(endpoint, chat_id, self.interval)
+        token = _current.set(profile)
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            _current.reset(token)
+            with self._lock:
+                self._active -= 1
+            self._writer.submit(self._write_and_prune, profile)
+
+    def _write_and_prune(self, profile: RequestProfile) -> None:
+        try:
+            self._write(profile)
+            self._prune()
+        except OSError as exc:
+            logger.warning(f"Could not write request profile to {self.out_dir}: {exc}")
+
+    def _prune(self) -> None:
+        """Delete the oldest profiles beyond max_files (a profile is its .folded/.json pair)."""
+        names = self.list_files()
+        stems = sorted({n.rsplit(".", 1)[0] for n in names})
+        stale = set(stems[: max(len(stems) - self.max_files, 0)])
+        for name in names:
+            if name.rsplit(".", 1)[0] in stale:
+                try:
+                    os.remove(os.path.join(self.out_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def _write(self, profile: RequestProfile) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        base = os.path.join(self.out_dir, f"{stamp}-{profile.endpoint}")
+        with open(f"{base}.folded", "w", encoding="utf-8") as fh:
+            for stack, count in profile.samples.most_common():
+                fh.write(f"{stack} {count}\n")
+        summary = {
+            "endpoint": profile.endpoint,
+            "chat_id": profile.chat_id,
+            "wall_ms": round(profile.wall_ms, 3),
+            # thread_time() of the event-loop thread over the request: includes every other
+            # request the loop served meanwhile, so it is only an upper bound for this one
+            "loop_thread_cpu_ms": round(profile.cpu_ms, 3),
+            "samples": sum(profile.samples.values()),
+            "interval_ms": profile.interval * 1000,
+            "stages": profile.stages,
+        }
+        with open(f"{base}.json", "w", encoding="utf-8") as fh:
+            json.dump(summary, fh, indent=2)
+
+    def list_files(self) -> List[str]:
+        if not os.path.isdir(self.out_dir):
+            return []
+        return sorted(n for n in os.listdir(self.out_dir) if _NAME_RE.match(n))
+
+    def path_for(self, name: str) -> Optional[str]:
+        if not _NAME_RE.match(name or ""):
+            return None
+        return os.path.join(self.out_dir, name)
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Time a stage of the current request if it is being profiled; no-op otherwise."""
+    profile = _current.get()
+    if profile is None:
+        return nullcontext()
+    return profile.stage(name)
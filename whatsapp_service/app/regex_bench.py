@@ -0,0 +1,144 @@
+"""
+Worst-case latency check for the local extraction tiers.
+
+Runs parse_bulk_message, extract_with_confidence, parse_shift and the distilled extractor
+over adversarial inputs (long runs that used to make patterns backtrack) and random fuzz
+built from the tokens the patterns look for, then reports the slowest cases. Exits non-zero
+if any input exceeds the budget, so it can gate changes to the patterns or the model.
+
+The distilled tier uses --model if given, otherwise a model trained on a few built-in
+postings; its cost depends on token count rather than on what the weights learned. It runs
+off the event loop, so it has its own, larger budget.
+
+Usage:
+    python -m app.regex_bench [--length 20000] [--fuzz 2000] [--budget-ms 50]
+                              [--model model.json] [--model-budget-ms 250]
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .distill import LocalExtractor, train
+from .schedule import parse_shift
+from .utils import extract_with_confidence, parse_bulk_message
+
+_FUZZ_TOKENS = [
+    " ", "  ", "\n", ";", ":", "-", "–", ".", ",", "@", "$", "+", "/",
+    "1", "12", "555", "9am", "5pm", "10:30", "at", "in", "located at", "per", "hour",
+    "position", "for", "hiring a", "business", "name", "is", "mon", "friday", "to",
+    "weekend", "morning", "pay", "rate", "cash", "a", "abc", "x.y", "Z",
+]
+
+
+_SAMPLE_POSTINGS = [
+    (
+        "Hiring a cashier at Joes Diner, 123 Main St. $18 per hour, Mon-Fri 4pm-10pm. Call +15551234567",
+        {"title": "cashier", "business_name": "Joes Diner", "location": "123 Main St",
+         "pay_rate": "$18", "shift_times": "Mon-Fri 4pm-10pm", "contact_phone": "+15551234567"},
+    ),
+    (
+        "Line cook position in Springfield, weekends 9am-5pm, 20/hr cash. Contact 555 987 6543",
+        {"title": "Line cook", "location": "Springfield", "shift_times": "weekends 9am-5pm",
+         "pay_rate": "20/hr", "contact_phone": "555 987 6543"},
+    ),
+]
+
+
+def sample_model() -> LocalExtractor:
+    return train([(text, fields, None) for text, fields in _SAMPLE_POSTINGS], epochs=4)
+
+
+def adversarial_cases(length: int) -> Dict[str, str]:
+    def repeat(unit: str) -> str:
+        return (unit * (length // len(unit) + 1))[:length]
+
+    return {
+        "spaces": repeat(" "),
+        "letters": repeat("a"),
+        "dotted": repeat("a."),
+        "digits": repeat("1"),
+        "digit_runs": repeat("1 "),
+        "dashes": repeat("1-"),
+        "at_prefix": repeat("at "),
+        "in_prefix": repeat("in ab "),
+        "position": repeat("position "),
+        "lead_in": repeat("hiring a " + "x" * 60 + " "),
+        "day_words": repeat("monday"),
+        "day_ranges": repeat("mon - "),
+        "labels": repeat("a:"),
+        "business": repeat("business "),
+        "clock": repeat("9:"),
+        "email_like": repeat("a@b."),
+    }
+
+
+def fuzz_cases(count: int, length: int, seed: int) -> Dict[str, str]:
+    rng = random.Random(seed)
+    cases = {}
+    for i in range(count):
+        parts: List[str] = []
+        size = 0
+        target = rng.randint(1, length)
+        while size < target:
+            token = rng.choice(_FUZZ_TOKENS) * rng.choice((1, 1, 1, 4, 50))
+            parts.append(token)
+            size += len(token)
+        cases[f"fuzz-{i}"] = "".join(parts)[:target]
+    return cases
+
+
+def _time(fn: Callable[[str], object], text: str) -> float:
+    started = time.perf_counter()
+    fn(text)
+    return (time.perf_counter() - started) * 1000
+
+
+def run(cases: Dict[str, str], model: Optional[LocalExtractor] = None) -> List[Tuple[float, str, str]]:
+    """Returns (ms, stage, case) for every stage and case, slowest first."""
+    stages: Dict[str, Callable[[str], object]] = {
+        "bulk_parse": parse_bulk_message,
+        "heuristic": lambda text: extract_with_confidence(text, 0.6),
+        "schedule": parse_shift,
+    }
+    if model is not None:
+        stages["distilled"] = model.extract
+    for fn in stages.values():
+        fn("warm up 9am-5pm")  # keep pattern compilation out of the timings
+    results = [
+        (_time(fn, text), stage, name) for name, text in cases.items() for stage, fn in stages.items()
+    ]
+    return sorted(results, reverse=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Worst-case latency of the local extraction tiers.")
+    parser.add_argument("--length", type=int, default=20000, help="characters per adversarial input")
+    parser.add_argument("--fuzz", type=int, default=2000, help="number of random fuzz inputs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--model", help="distilled model to time (default: a small built-in one)")
+    parser.add_argument("--model-budget-ms", type=float, default=250.0, help="budget for the distilled tier")
+    args = parser.parse_args(argv)
+
+    model = LocalExtractor.load(args.model) if args.model else sample_model()
+    cases = adversarial_cases(args.length)
+    cases.update(fuzz_cases(args.fuzz, args.length, args.seed))
+    results = run(cases, model)
+    for ms, stage, name in results[: args.top]:
+        print(f"{ms:9.2f} ms  {stage:<11} {name}")
+    over = [r for r in results if r[1] != "distilled" and r[0] > args.budget_ms]
+    over_model = [r for r in results if r[1] == "distilled" and r[0] > args.model_budget_ms]
+    worst = max((r[0] for r in results if r[1] != "distilled"), default=0.0)
+    worst_model = max((r[0] for r in results if r[1] == "distilled"), default=0.0)
+    print(f"{len(cases)} inputs, worst {worst:.2f} ms, {len(over)} over {args.budget_ms} ms budget")
+    print(f"distilled worst {worst_model:.2f} ms, {len(over_model)} over {args.model_budget_ms} ms budget")
+    over += over_model
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
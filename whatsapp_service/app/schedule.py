@@ -0,0 +1,214 @@
+import re
+from typing import List, Optional, Tuple
+
+# Weekly availability as a 7 x 48 bitmap of half-hour slots; bit = day * 48 + slot, Monday = 0
+# Bump when parse_shift changes meaning; stored bitmaps parsed by older versions get re-parsed
+PARSER_VERSION = 2
+SLOTS_PER_DAY = 48
+WEEK_BITS = 7 * SLOTS_PER_DAY
+_DAY_MASK = (1 << SLOTS_PER_DAY) - 1
+
+_DAY_NAMES = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+# Real day names and their usual abbreviations only, so "monthly" or "sunny" are not days
+_DAY = (
+    r"(?:mon(?:day)?|tue(?:s(?:day)?)?|wed(?:s|nesday)?|thu(?:r(?:s(?:day)?)?)?"
+    r"|fri(?:day)?|sat(?:urday)?|sun(?:day)?)s?"
+)
+_DAY_RANGE_RE = re.compile(rf"\b({_DAY})\s{{0,3}}(?:-|–|—|to|through|thru)\s{{0,3}}({_DAY})\b", re.IGNORECASE)
+_DAY_RE = re.compile(rf"\b({_DAY})\b", re.IGNORECASE)
+_DAY_GROUPS = [
+    (re.compile(r"\bweekdays?\b", re.IGNORECASE), range(0, 5)),
+    (re.compile(r"\bweekends?\b", re.IGNORECASE), range(5, 7)),
+    (re.compile(r"\b(?:daily|every\s?day|7 days)\b", re.IGNORECASE), range(0, 7)),
+]
+_CLOCK = r"(\d{1,2})(?::(\d{2}))?\s{0,2}(?:([ap])\.?m\b\.?)?"
+_TIME_RANGE_RE = re.compile(rf"\b{_CLOCK}\s{{0,3}}(?:-|–|—|to|until|till)\s{{0,3}}{_CLOCK}", re.IGNORECASE)
+_PERIODS = [
+    (re.compile(r"\bmornings?\b", re.IGNORECASE), (6 * 60, 12 * 60)),
+    (re.compile(r"\bafternoons?\b", re.IGNORECASE), (12 * 60, 17 * 60)),
+    (re.compile(r"\bevenings?\b", re.IGNORECASE), (17 * 60, 22 * 60)),
+    (re.compile(r"\bnights?\b|\bovernight\b", re.IGNORECASE), (22 * 60, 6 * 60)),
+    (re.compile(r"\ball[\s-]day\b|\b24/7\b|\b24 hours\b", re.IGNORECASE), (0, 24 * 60)),
+]
+
+
+def _day_index(word: str) -> Optional[int]:
+    prefix = word[:3].lower()
+    return _DAY_NAMES.index(prefix) if prefix in _DAY_NAMES else None
+
+
+def _day_items(text: str) -> List[Tuple[int, List[int]]]:
+    """(position, days) for each day range, single day or day group in text."""
+    items = []
+    for m in _DAY_RANGE_RE.finditer(text):
+        start, end = _day_index(m.group(1)), _day_index(m.group(2))
+        if start is None or end is None:
+            continue
+        # Ranges may wrap around the week, e.g. Fri-Mon
+        span = (end - start) % 7
+        items.append((m.start(), [(start + i) % 7 for i in range(span + 1)]))
+    # Single days outside ranges, e.g. the Fri in "Mon-Wed, Fri"; blanking keeps positions
+    rest = _DAY_RANGE_RE.sub(lambda m: " " * len(m.group(0)), text)
+    for m in _DAY_RE.finditer(rest):
+        index = _day_index(m.group(1))
+        if index is not None:
+            items.append((m.start(), [index]))
+    for pattern, group in _DAY_GROUPS:
+        for m in pattern.finditer(text):
+            items.append((m.start(), list(group)))
+    return items
+
+
+def _to_minutes(hour: str, minute: str, meridiem: str) -> Optional[int]:
+    h, m = int(hour), int(minute or 0)
+    if m >= 60:
+        return None
+    if meridiem:
+        if not 1 <= h <= 12:
+            return None
+        h = h % 12 + (12 if meridiem.lower() == "p" else 0)
+    elif h > 24:
+        return None
+    return min(h * 60 + m, 24 * 60)
+
+
+def _bare_range(h1: str, h2: str) -> Optional[Tuple[int, int]]:
+    """Read "9-5" or "4 to 10" as daytime hours: starts from 6am, ends after the start."""
+    start, end = int(h1), int(h2)
+    if start > 24 or end > 24:
+        return None
+    if start <= 12 and end <= 12:
+        start = start + 12 if start < 6 else start
+        while end <= start and end < 24:
+            end += 12
+    if not start < end <= 24:
+        return None
+    return start * 60, end * 60
+
+
+def _time_items(text: str, bare: bool) -> List[Tuple[int, Tuple[int, int]]]:
+    """
+    (position, (start, end) minutes) for each time range or period in text. Bare ranges
+    like "9-5" are only read when `bare` is set; on their own they are more likely a count
+    or a date than a shift.
+    """
+    items = []
+    for m in _TIME_RANGE_RE.finditer(text):
+        h1, m1, ap1, h2, m2, ap2 = m.groups()
+        if not (ap1 or ap2 or m1 or m2):
+            span = _bare_range(h1, h2) if bare else None
+            if span:
+                items.append((m.start(), span))
+            continue
+        if not ap1 and ap2:
+            # "9-5pm": the start inherits pm only if that keeps it before the end
+            ap1 = ap2 if int(h1) % 12 <= int(h2) % 12 else ("a" if ap2.lower() == "p" else "p")
+        start, end = _to_minutes(h1, m1, ap1), _to_minutes(h2, m2, ap2)
+        if start is None or end is None:
+            continue
+        items.append((m.start(), (start, end)))
+    for pattern, span in _PERIODS:
+        for m in pattern.finditer(text):
+            items.append((m.start(), span))
+    return items
+
+
+def _pair(
+    days: List[Tuple[int, List[int]]], times: List[Tuple[int, Tuple[int, int]]]
+) -> List[Tuple[List[int], List[Tuple[int, int]]]]:
+    """
+    Pair each run of adjacent day expressions with the run of times next to it, so
+    "Mon-Fri 9am-5pm, Sat 10am-2pm" gives Saturday only 10-2. Text that starts with days
+    pairs each day run with the times after it, text that starts with times pairs each time
+    run with the days after it; a trailing unpaired run joins the last pair.
+    """
+    runs: List[Tuple[str, list]] = []
+    for _, kind, value in sorted([(p, "d", v) for p, v in days] + [(p, "t", v) for p, v in times]):
+        if runs and runs[-1][0] == kind:
+            runs[-1][1].append(value)
+        else:
+            runs.append((kind, [value]))
+    pairs: List[Tuple[List[int], List[Tuple[int, int]]]] = []
+    for i in range(0, len(runs), 2):
+        first = runs[i]
+        second = runs[i + 1] if i + 1 < len(runs) else None
+        if second is None:
+            if not pairs:
+                break
+            day_list, time_list = pairs[-1]
+            if first[0] == "d":
+                day_list.extend(d for group in first[1] for d in group)
+            else:
+                time_list.extend(first[1])
+            break
+        day_run, time_run = (first, second) if first[0] == "d" else (second, first)
+        pairs.append(([d for group in day_run[1] for d in group], list(time_run[1])))
+    return pairs
+
+
+def _set_range(mask: int, day: int, start: int, end: int) -> int:
+    first = start // 30
+    last = -(-end // 30)  # ceil: a shift ending 10:15 occupies the 10:00 slot
+    if end <= start:
+        # Overnight: runs to midnight, then continues on the next day
+        mask |= ((1 << (SLOTS_PER_DAY - first)) - 1) << (day * SLOTS_PER_DAY + first)
+        next_day = (day + 1) % 7
+        return mask | ((1 << last) - 1) << (next_day * SLOTS_PER_DAY)
+    return mask | ((1 << (last - first)) - 1) << (day * SLOTS_PER_DAY + first)
+
+
+def parse_shift(text: str) -> int:
+    """
+    Parse free-text shift times ("Mon-Fri 4pm-10pm", "9AM - 5PM Monday to Friday",
+    "weekend mornings", "Mon-Fri 9am-5pm, Sat 10am-2pm") into a weekly bitmap. Each time
+    range applies to the days written next to it. Days default to the whole week when only
+    times are given, and times to the whole day when only days are given ("Mon-Fri",
+    "weekends"); with days present, bare ranges ("Monday 9-5") read as daytime hours.
+    Text with neither days nor times yields 0.
+    """
+    text = (text or "")[:500]
+    days = _day_items(text)
+    times = _time_items(text, bare=bool(days))
+    if not days and not times:
+        return 0
+    if not times:
+        pairs = [(sorted({d for _, group in days for d in group}), [(0, 24 * 60)])]
+    elif not days:
+        pairs = [(list(range(7)), [span for _, span in times])]
+    else:
+        pairs = _pair(days, times)
+    mask = 0
+    for day_list, spans in pairs:
+        for day in set(day_list):
+            for start, end in spans:
+                mask = _set_range(mask, day, start, end)
+    return mask & ((1 << WEEK_BITS) - 1)
+
+
+def to_hex(mask: int) -> str:
+    return format(mask, f"0{WEEK_BITS // 4}x")
+
+
+def from_hex(value: Optional[str]) -> int:
+    try:
+        return int(value, 16) if value else 0
+    except ValueError:
+        return 0
+
+
+def describe(mask: int) -> List[str]:
+    """Human-readable day/slot ranges, e.g. ["Mon 16:00-22:00"]; handy for debugging parses."""
+    out = []
+    for day in range(7):
+        bits = (mask >> (day * SLOTS_PER_DAY)) & _DAY_MASK
+        slot = 0
+        while slot < SLOTS_PER_DAY:
+            if bits >> slot & 1:
+                start = slot
+                while slot < SLOTS_PER_DAY and bits >> slot & 1:
+                    slot += 1
+                out.append(
+                    f"{_DAY_NAMES[day].title()} {start // 2:02d}:{start % 2 * 30:02d}-{slot // 2:02d}:{slot % 2 * 30:02d}"
+                )
+            slot += 1
+    return out
@@ -0,0 +1,79 @@
+"""
+Startup-time check for the service.
+
+Each run starts a fresh interpreter, times `import app.main`, then runs the app's startup
+handlers and polls the /ready handler until it returns 200 (so a configured PG_DSN is
+included). Reports the median and worst run and exits non-zero if any run exceeds the
+budget, so it can gate changes that add import-time or startup work.
+
+Usage:
+    python -m app.startup_bench [--runs 5] [--budget-ms 1000] [--ready-timeout 30]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+_CHILD = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+
+async def boot():
+    await main.app.router.startup()
+    deadline = imported + {timeout}
+    ready = False
+    while time.perf_counter() < deadline:
+        if (await main.ready()).status_code == 200:
+            ready = True
+            break
+        await asyncio.sleep(0.005)
+    at = time.perf_counter()
+    await main.app.router.shutdown()
+    return ready, at
+
+ready, ready_at = asyncio.run(boot())
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "ready_ms": (ready_at - started) * 1000,
+    "ready": ready,
+}}))
+"""
+
+
+def run_once(ready_timeout: float) -> Dict[str, float]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD.format(timeout=ready_timeout)],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Import and startup-to-ready time of the service.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="limit for import plus startup until ready")
+    parser.add_argument("--ready-timeout", type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    runs = [run_once(args.ready_timeout) for _ in range(args.runs)]
+    for key in ("import_ms", "ready_ms"):
+        values = [r[key] for r in runs]
+        print(f"{key:<10} median {statistics.median(values):8.1f} ms  worst {max(values):8.1f} ms")
+    not_ready = sum(1 for r in runs if not r["ready"])
+    over = sum(1 for r in runs if r["ready_ms"] > args.budget_ms)
+    print(f"{args.runs} runs, {over} over {args.budget_ms} ms budget, {not_ready} never ready")
+    if over or not_ready:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
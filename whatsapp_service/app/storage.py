@@ -1,24 +1,181 @@
+import os
 import threading
-from typing import List, Optional
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 from .models import JobPayload
+from .schedule import from_hex
+
+
+_View = Tuple[Tuple[dict, ...], Tuple[int, ...], Tuple[float, ...]]
 
 
 class JobStore:
-    """Thread-safe in-memory job store. Replace with DB in production."""
+    """
+    Capped in-memory job store (ring buffer) indexed by confirmation code and source channel.
+    Writers serialize on a lock and only bump a version, so an add is O(1). The first read
+    after a write rebuilds an immutable snapshot; later reads use it without the lock.
+    Every add or update gets a new monotonic `seq`, recorded in a capped change log.
+    Jobs older than ttl_days (0 = never) are hidden from listings, as in Postgres.
+    Replace with DB in production.
+    """
 
-    def __init__(self):
+    def __init__(self, capacity: int = 10000, ttl_days: float = 0):
+        self.capacity = capacity
+        self.ttl_days = ttl_days
         self._lock = threading.Lock()
-        self._jobs: List[dict] = []
+        self._ring: Deque[dict] = deque()
+        self._source_rings: Dict[str, Deque[dict]] = {}
+        self._by_code: Dict[str, dict] = {}
+        self._added: Dict[str, float] = {}  # add time per code, aligned with _by_code
+        self._ring_bits: Deque[int] = deque()  # shift bitmaps, aligned with _ring
+        self._source_bits: Dict[str, Deque[int]] = {}
+        self._ring_times: Deque[float] = deque()  # add times, aligned with _ring (ascending)
+        self._source_times: Dict[str, Deque[float]] = {}
+        # Read views as (version, (jobs, shift bitmaps, add times)), rebuilt lazily when stale;
+        # entries are replaced whole, never mutated in place
+        self._version = 0
+        self._snapshot: Tuple[int, _View] = (0, ((), (), ()))
+        self._source_versions: Dict[str, int] = {}
+        self._by_source: Dict[str, Tuple[int, _View]] = {}
+        self._seq = 0
+        self._changes: Deque[Tuple[int, str]] = deque(maxlen=capacity * 2)
+
+    def add(self, job: JobPayload) -> dict:
+        record = job.dict()
+        bits = from_hex(record.get("shift_bits"))
+        source = record.get("source_channel")
+        added = time.time()
+        with self._lock:
+            self._seq += 1
+            record["seq"] = self._seq
+            self._changes.append((self._seq, record["confirmation_code"]))
+            self._ring.append(record)
+            self._ring_bits.append(bits)
+            self._source_rings.setdefault(source, deque()).append(record)
+            self._source_bits.setdefault(source, deque()).append(bits)
+            self._ring_times.append(added)
+            self._source_times.setdefault(source, deque()).append(added)
+            self._by_code[record["confirmation_code"]] = record
+            self._added[record["confirmation_code"]] = added
+            self._version += 1
+            self._touch(source)
+            if len(self._ring) > self.capacity:
+                evicted = self._ring.popleft()
+                self._ring_bits.popleft()
+                self._ring_times.popleft()
+                evicted_source = evicted.get("source_channel")
+                # Global FIFO order means the evicted job is also the oldest of its source
+                self._source_rings[evicted_source].popleft()
+                self._source_bits[evicted_source].popleft()
+                self._source_times[evicted_source].popleft()
+                if not self._source_rings[evicted_source]:
+                    del self._source_rings[evicted_source]
+                    del self._source_bits[evicted_source]
+                    del self._source_times[evicted_source]
+                    self._by_source.pop(evicted_source, None)
+                if self._by_code.get(evicted["confirmation_code"]) is evicted:
+                    del self._by_code[evicted["confirmation_code"]]
+                    del self._added[evicted["confirmation_code"]]
+                self._touch(evicted_source)
+        return record
+
+    def _touch(self, source: str) -> None:
+        self._source_versions[source] = self._source_versions.get(source, 0) + 1
 
-    def add(self, job: JobPayload) -> None:
+    def _view(self, source: Optional[str]) -> _View:
+        if not source:
+            version, view = self._snapshot
+            if version == self._version:
+                return view
+            with self._lock:
+                if self._snapshot[0] != self._version:
+                    self._snapshot = (
+                        self._version,
+                        (tuple(self._ring), tuple(self._ring_bits), tuple(self._ring_times)),
+                    )
+                return self._snapshot[1]
+        cached = self._by_source.get(source)
+        if cached is not None and cached[0] == self._source_versions.get(source):
+            return cached[1]
         with self._lock:
-            self._jobs.append(job.dict())
+            version = self._source_versions.get(source)
+            if source not in self._source_rings:
+                return ((), (), ())
+            view = (
+                tuple(self._source_rings[source]),
+                tuple(self._source_bits[source]),
+                tuple(self._source_times[source]),
+            )
+            self._by_source[source] = (version, view)
+            return view
+
+    def all(self, source: Optional[str] = None, available: Optional[int] = None) -> List[dict]:
+        """All jobs (optionally one source); with `available`, only shifts overlapping that bitmap."""
+        jobs, bits, added = self._view(source)
+        if self.ttl_days > 0:
+            # Add times ascend with ring order, so the unexpired jobs are a suffix
+            start = bisect_left(added, time.time() - self.ttl_days * 86400)
+            jobs, bits = jobs[start:], bits[start:]
+        if available is None:
+            return list(jobs)
+        return [job for job, mask in zip(jobs, bits) if mask & available]
+
+    def get(self, confirmation_code: str) -> Optional[dict]:
+        return self._by_code.get(confirmation_code)
+
+    def update_images(self, confirmation_code: str, images: List[str], thumbnails: List[str]) -> None:
+        with self._lock:
+            job = self._by_code.get(confirmation_code)
+            if job is not None:
+                job["images"] = list(images)
+                job["thumbnails"] = list(thumbnails)
+                self._seq += 1
+                job["seq"] = self._seq
+                self._changes.append((self._seq, confirmation_code))
+
+    def head_seq(self) -> int:
+        return self._seq
 
-    def all(self, source: Optional[str] = None) -> List[dict]:
+    def changes_since(self, cursor: int, limit: int = 500) -> Tuple[List[dict], int, bool]:
+        """
+        Jobs added or updated after cursor, oldest change first, as (jobs, next_cursor, reset).
+        reset is True when cursor predates the change log, or is ahead of it (a client that
+        outlived a restart of this store); jobs is then a full snapshot. Jobs past ttl_days
+        are left out, as in Postgres.
+        """
+        cutoff = time.time() - self.ttl_days * 86400 if self.ttl_days > 0 else None
         with self._lock:
-            if source:
-                return [j for j in self._jobs if j.get("source_channel") == source]
-            return list(self._jobs)
+            oldest = self._changes[0][0] if self._changes else self._seq + 1
+            if cursor < oldest - 1 or cursor > self._seq:
+                jobs = list(self._ring)
+                if cutoff is not None:
+                    jobs = jobs[bisect_left(self._ring_times, cutoff) :]
+                return jobs, self._seq, True
+            codes: List[str] = []
+            for seq, code in reversed(self._changes):
+                if seq <= cursor:
+                    break
+                codes.append(code)
+            jobs: List[dict] = []
+            seen = set()
+            for code in reversed(codes):
+                job = self._by_code.get(code)
+                # A job updated twice appears once, at its latest seq
+                if job is None or code in seen or job["seq"] <= cursor:
+                    continue
+                if cutoff is not None and self._added[code] < cutoff:
+                    continue
+                seen.add(code)
+                jobs.append(job)
+            jobs.sort(key=lambda j: j["seq"])
+            jobs = jobs[:limit]
+            next_cursor = jobs[-1]["seq"] if len(jobs) == limit else max(cursor, self._seq)
+            return jobs, next_cursor, False
 
 
-store = JobStore()
+store = JobStore(
+    int(os.getenv("JOB_STORE_CAPACITY", "10000")),
+    float(os.getenv("JOB_LISTING_TTL_DAYS", "0")),
+)
@@ -30,6 +30,7 @@ def parse_bulk_message(text: str) -> Tuple[dict, list]:
     Extracts fields from a single free-text message.
     Handles semicolons or new lines; tolerates different dash characters.
     """
+    text = (text or "")[:MAX_MESSAGE_CHARS]
     required = [
         "title",
         "pay_rate",
@@ -90,74 +91,174 @@ def parse_bulk_message(text: str) -> Tuple[dict, list]:
     return found, missing
 
 
+# Confidence assigned to fields read from an explicit "Label: value" line
+LABELLED_CONFIDENCE = 1.0
+
+# Input caps for the regex tiers. Every pattern below has bounded repeats or a fixed anchor,
+# so matching time grows linearly with input; see `python -m app.regex_bench`.
+MAX_MESSAGE_CHARS = 8000
+MAX_EXTRACT_CHARS = 4000
+
+_DAY = r"(?:mon|tue|wed|thu|fri|sat|sun)[a-z]{0,6}"
+
+
 def heuristic_extract(text: str) -> Dict[str, str]:
+    """Heuristic extraction without confidence scores; see heuristic_extract_scored."""
+    return {k: v for k, (v, _) in heuristic_extract_scored(text).items()}
+
+
+def heuristic_extract_scored(text: str) -> Dict[str, Tuple[str, float]]:
     """
-    Lightweight heuristic extraction for free text:
+    Lightweight heuristic extraction for free text, returning {field: (value, confidence)}:
     - pay_rate: finds $ amounts or digits + /hr/day/week/month
     - pay_type: cash/hourly/salary/monthly keywords
     - contact_phone: phone number or email if no phone
     - shift_times: time ranges like 9AM-5PM or 9am – 5pm
     - location: after 'at <loc>' patterns
     - title: first noun phrase proxy from leading words
+    Confidence (0..1) reflects how specific the matching pattern was.
+    Only the first MAX_EXTRACT_CHARS characters are examined.
     """
-    out: Dict[str, str] = {}
-    original = text
+    text = (text or "")[:MAX_EXTRACT_CHARS]
+    out: Dict[str, Tuple[str, float]] = {}
     # helper to clean trailing punctuation
     def clean(val: str) -> str:
         return val.strip().strip(".,;")
     # Pay rate
-    m = re.search(r"(\$?\s?\d+[\.]?\d*)\s*(/|\s?per\s?)?(hour|hr|day|week|month|mo)?", text, re.IGNORECASE)
+    m = re.search(r"(\$?\s?\d+(?:\.\d*)?)\s{0,3}(/|\s?per\s?)?(hour|hr|day|week|month|mo)?", text, re.IGNORECASE)
     if m:
         rate = m.group(1).replace(" ", "")
         unit = m.group(3) or ""
-        out["pay_rate"] = f"{rate}/{unit}" if unit else rate
+        # A bare number is often a phone fragment, address or count
+        conf = (0.5 if rate.startswith("$") else 0.2) + (0.4 if unit else 0.0)
+        out["pay_rate"] = (f"{rate}/{unit}" if unit else rate, conf)
     # Pay type
     m = re.search(r"(cash|salary|salaried|hourly|per\s*hour|per\s*day|per\s*week|per\s*month)", text, re.IGNORECASE)
     if m:
-        out["pay_type"] = m.group(1).lower()
+        out["pay_type"] = (m.group(1).lower(), 0.8)
     # Contact phone/email
-    phone = re.search(r"(\+?\d[\d\-\s]{7,}\d)", text)
+    phone = re.search(r"(\+?\d[\d\-\s]{7,25}\d)", text)
     if phone:
-        out["contact_phone"] = clean(phone.group(1))
+        value = clean(phone.group(1))
+        out["contact_phone"] = (value, 0.9 if normalize_phone(value) else 0.3)
     else:
-        email = re.search(r"([A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,})", text, re.IGNORECASE)
+        # Start only at the beginning of a run, so a long run without "@" is scanned once
+        email = re.search(r"(?<![A-Z0-9._%+-])([A-Z0-9._%+-]{1,64}@[A-Z0-9.-]{1,255}\.[A-Z]{2,24})", text, re.IGNORECASE)
         if email:
-            out["contact_phone"] = clean(email.group(1))
+            out["contact_phone"] = (clean(email.group(1)), 0.7)
     # Shift times
     shift = re.search(r"(\d{1,2}\s?(?:am|pm|AM|PM)\s?[-–—]\s?\d{1,2}\s?(?:am|pm|AM|PM))", text)
     if shift:
-        out["shift_times"] = shift.group(1)
+        out["shift_times"] = (shift.group(1), 0.5)  # no days yet
     # Location
-    loc = None
     # cut at keywords to avoid dragging pay rate into location
-    loc_match = re.search(r"(?:at|located at|in)\s+([A-Za-z0-9 ,.-]{5,})", text, re.IGNORECASE)
+    loc_match = re.search(r"\b(located at|at|in)\s+([A-Za-z0-9 ,.-]{5,160})", text, re.IGNORECASE)
     if loc_match:
-        candidate = loc_match.group(1)
+        candidate = loc_match.group(2)
         candidate = re.split(r"(?:with|offering|pay rate|payment|from\s+\d)", candidate, maxsplit=1)[0]
         loc = clean(candidate)
-    if loc:
-        out["location"] = loc
+        if loc:
+            if loc_match.group(1).lower() == "located at":
+                conf = 0.7
+            elif re.match(r"\d", loc) or re.search(r"\b[A-Z][a-z]", loc):
+                conf = 0.65  # "in downtown Fresno", "at 12 Main St": a place name or address
+            else:
+                conf = 0.35  # "in the evening", "at least": lowercase words are rarely a place
+            out["location"] = (loc, conf)
     # Business name / type
-    bname = re.search(r"(?:business name|company name|business)\s*(?:is|:)\s*([^.;\n]{3,120})", text, re.IGNORECASE)
+    bname = re.search(r"(business name|company name|business)\s{0,3}(?:is|:)\s{0,3}([^.;\n]{3,120})", text, re.IGNORECASE)
     if bname:
-        out["business_name"] = clean(bname.group(1 if bname.lastindex == 1 else 2))
-    btype = re.search(r"(?:business type|type of business)\s*(?:is|:)\s*([^.;\n]{3,120})", text, re.IGNORECASE)
+        explicit = bname.group(1).lower() != "business"
+        out["business_name"] = (clean(bname.group(2)), 0.85 if explicit else 0.6)
+    btype = re.search(r"(?:business type|type of business)\s{0,3}(?:is|:)\s{0,3}([^.;\n]{3,120})", text, re.IGNORECASE)
     if btype:
-        out["business_type"] = clean(btype.group(1 if btype.lastindex == 1 else 2))
+        out["business_type"] = (clean(btype.group(1)), 0.85)
     # Title: handle "position for/of <role>" and strip lead-in phrases
     title = None
     t1 = re.search(
-        r"(?:I have a|I have an|we have a|we have an|hiring a|hiring an|opening for a|opening for an)?\s*position(?:\s+(?:for|of))?\s+([A-Za-z ,'-]{3,80})",
+        # A lead-in phrase ("we have a ...") is optional and uncaptured, so anchor on the keyword
+        r"position(?:\s{1,3}(?:for|of))?\s{1,3}([A-Za-z ,'-]{3,80})",
         text,
         re.IGNORECASE,
     )
     if t1:
-        title = t1.group(1).strip()
+        role = t1.group(1).strip()
+        # "position at <place>" captured the place, not the role
+        title = (role, 0.2 if re.match(r"(?:at|in|with)\b", role, re.IGNORECASE) else 0.7)
     else:
         sentence = text.strip().split(".")[0]
         words = sentence.split()
         if 2 <= len(words) <= 8:
-            title = " ".join(words[:5])
+            title = (" ".join(words[:5]), 0.3)
     if title:
-        out["title"] = clean(title)
+        out["title"] = (clean(title[0]), title[1])
     return out
+
+
+def _fallback_pay_rate(text: str, found: Dict[str, Tuple[str, float]]) -> Optional[Tuple[str, float]]:
+    # Prefer an amount that follows a pay keyword over the first number in the text
+    m = re.search(
+        r"(?:pay|rate|salary|wage|earn)[^$\d\n]{0,20}(\$?\s?\d+(?:\.\d+)?)\s{0,3}(?:/|per\s{0,3})?(hour|hr|day|week|month|mo)?",
+        text,
+        re.IGNORECASE,
+    )
+    if not m:
+        return None
+    rate = m.group(1).replace(" ", "")
+    unit = m.group(2) or ""
+    return (f"{rate}/{unit}" if unit else rate, 0.9 if unit else 0.7)
+
+
+def _fallback_pay_type(text: str, found: Dict[str, Tuple[str, float]]) -> Optional[Tuple[str, float]]:
+    # Infer from the pay rate unit
+    rate = found.get("pay_rate", ("", 0.0))[0].lower()
+    if rate.endswith(("/hour", "/hr")):
+        return "hourly", 0.65
+    if rate.endswith(("/month", "/mo", "/week")):
+        return "salary", 0.6
+    return None
+
+
+def _fallback_shift_times(text: str, found: Dict[str, Tuple[str, float]]) -> Optional[Tuple[str, float]]:
+    # Attach a day range ("Mon-Fri", "Monday to Friday") to the time range
+    days = re.search(rf"\b({_DAY}\s{{0,3}}(?:-|–|—|to|through)\s{{0,3}}{_DAY})\b", text, re.IGNORECASE)
+    current = found.get("shift_times")
+    if days and current:
+        return f"{days.group(1)} {current[0]}", 0.85
+    if days:
+        return days.group(1), 0.5
+    return None
+
+
+def _fallback_title(text: str, found: Dict[str, Tuple[str, float]]) -> Optional[Tuple[str, float]]:
+    # "I have a <role> position" puts the role before the keyword
+    m = re.search(
+        r"(?:I have an?|we have an?|hiring an?|opening for an?)\s{1,3}([A-Za-z '-]{3,60}?)\s{1,3}(?:position|role|job|opening)\b",
+        text,
+        re.IGNORECASE,
+    )
+    if m:
+        return m.group(1).strip(), 0.75
+    return None
+
+
+# Per-field targeted strategies, tried when the generic heuristic is missing or unsure
+_FIELD_FALLBACKS = {
+    "pay_rate": _fallback_pay_rate,
+    "pay_type": _fallback_pay_type,
+    "shift_times": _fallback_shift_times,
+    "title": _fallback_title,
+}
+
+
+def extract_with_confidence(text: str, threshold: float) -> Dict[str, Tuple[str, float]]:
+    """Scored heuristic extraction, refined by per-field fallbacks below threshold."""
+    text = (text or "")[:MAX_EXTRACT_CHARS]
+    found = heuristic_extract_scored(text)
+    for field, strategy in _FIELD_FALLBACKS.items():
+        if found.get(field, ("", 0.0))[1] >= threshold:
+            continue
+        better = strategy(text, found)
+        if better and better[1] > found.get(field, ("", 0.0))[1]:
+            found[field] = better
+    return found